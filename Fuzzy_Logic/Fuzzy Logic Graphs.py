@@ -1,7 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
 
 def plot_membership_functions():
+    import matplotlib.pyplot as plt
+
     # Входная переменная S (Расстояние до целевого объекта)
     S = np.linspace(0, 200, 500)
     small_distance = np.where(S <= 70, 1, np.maximum(1 - (S - 70) / 50, 0))
@@ -87,4 +88,5 @@ def plot_membership_functions():
     plt.tight_layout()
     plt.show()
 
-plot_membership_functions()
+if __name__ == "__main__":
+    plot_membership_functions()
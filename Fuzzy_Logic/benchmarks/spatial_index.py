@@ -0,0 +1,82 @@
+# spatial_index.py
+"""Scaling of obstacle queries: full scan vs ObstacleGrid.
+
+The arena grows with the obstacle count so that obstacle density stays that
+of the standard 2 x 2 m field with 4 bars; the full scan then costs O(N) per
+step while grid queries stay roughly constant.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m benchmarks.spatial_index --counts 4 16 64 256 1000
+"""
+import argparse
+import math
+import random
+import time
+from simulation.engine import SimulationEngine
+from simulation.spatial import ObstacleGrid
+from utils.utils import get_obstacle_info
+
+
+def _layout(n, field_size, rng):
+    obstacles = []
+    for _ in range(n):
+        width = rng.uniform(0.3, 0.5)
+        obstacles.append([rng.uniform(0.0, field_size - width), rng.uniform(0.0, field_size), width])
+    return obstacles
+
+
+def _scan_step(obstacles, speeds, robot_pos):
+    for obs, speed in zip(obstacles, speeds):
+        obs[0] += speed
+    get_obstacle_info(robot_pos, [(obs[0], obs[1]) for obs in obstacles])
+    half_height = SimulationEngine.obstacle_height / 2
+    for x, y, width in obstacles:
+        rect = (x, y - half_height, x + width, y + half_height)
+        if SimulationEngine.check_circle_rect_collision(robot_pos, SimulationEngine.robot_radius, rect):
+            break
+
+
+def _grid_step(grid, speeds, robot_pos):
+    for i, speed in enumerate(speeds):
+        grid.obstacles[i][0] += speed
+        grid.update(i)
+    get_obstacle_info(robot_pos, grid.points_within(robot_pos, SimulationEngine.detection_range))
+    grid.circle_collides(robot_pos, SimulationEngine.robot_radius)
+
+
+def measure(n, steps=200, seed=0):
+    """Mean seconds per step (move all obstacles, sense, collide) for both methods."""
+    rng = random.Random(seed)
+    field_size = 2.0 * math.sqrt(max(n, 4) / 4)
+    obstacles = _layout(n, field_size, rng)
+    speeds = [rng.uniform(-0.0005, 0.0005) for _ in range(n)]
+    robots = [(rng.uniform(0.25, field_size - 0.25), rng.uniform(0.25, field_size - 0.25)) for _ in range(steps)]
+
+    start = time.perf_counter()
+    for robot_pos in robots:
+        _scan_step(obstacles, speeds, robot_pos)
+    scan = (time.perf_counter() - start) / steps
+
+    grid = ObstacleGrid(obstacles, field_size=field_size, obstacle_height=SimulationEngine.obstacle_height)
+    start = time.perf_counter()
+    for robot_pos in robots:
+        _grid_step(grid, speeds, robot_pos)
+    indexed = (time.perf_counter() - start) / steps
+    return scan, indexed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Obstacle query scaling benchmark")
+    parser.add_argument('--counts', type=int, nargs='+', default=[4, 16, 64, 256, 1000])
+    parser.add_argument('--steps', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print("{:>8} {:>14} {:>14} {:>8}".format("obstacles", "scan us/step", "grid us/step", "speedup"))
+    for n in args.counts:
+        scan, indexed = measure(n, args.steps)
+        print("{:>8} {:>14.1f} {:>14.1f} {:>8.2f}".format(n, scan * 1e6, indexed * 1e6, scan / indexed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+# suite.py
+"""Repeatable benchmarks of controller inference and simulation throughput.
+
+Every scenario draws its inputs from a fixed seed, so two runs measure the
+same work. Per-call latencies are reported as percentiles in microseconds,
+loops as steps per second, and peak Python allocations (tracemalloc, in
+separate runs so they do not skew the timings) in KiB.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m benchmarks.suite                          # run and print
+    python -m benchmarks.suite --save baseline.json     # store a baseline
+    python -m benchmarks.suite --compare baseline.json  # flag regressions
+    python -m benchmarks.suite --only engine batch --quick
+    python -m benchmarks.suite --only cold_start          # import-to-first-decision
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from controllers import mamdani
+from controllers.arbitration import BlendedArbiter
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import OBSTACLE_RULES, ObstacleController
+from simulation.engine import SimulationEngine, RUNNING
+from simulation.world import BatchWorld
+from utils.utils import compute_fuzzy_control
+
+# Libraries the control path must not import (plotting, display, reference skfuzzy mode)
+HEAVY_MODULES = ('skfuzzy', 'scipy', 'networkx', 'matplotlib', 'pygame')
+
+# Run in a fresh interpreter: import the control path, build the controllers, take one decision
+_COLD_START = """
+import json, sys, time
+start = time.perf_counter()
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from utils.utils import compute_fuzzy_control
+imported = time.perf_counter()
+goal, obstacle = GoalController(compiled={compiled}), ObstacleController(compiled={compiled})
+built = time.perf_counter()
+compute_fuzzy_control([1.0, 0.3], [1.2, 1.8], [(1.1, 0.5)], goal, obstacle)
+decided = time.perf_counter()
+print(json.dumps([imported - start, built - imported, decided - built,
+                  [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def percentiles(samples_ns):
+    """Latency summary of per-call timings given in nanoseconds, in microseconds."""
+    us = np.asarray(samples_ns, dtype=float) / 1e3
+    p50, p90, p99 = np.percentile(us, [50, 90, 99])
+    return {'p50_us': p50, 'p90_us': p90, 'p99_us': p99, 'mean_us': us.mean(), 'max_us': us.max()}
+
+
+def time_calls(func, args_list, warmup=20):
+    """Per-call latency percentiles of ``func(*args)`` over ``args_list``."""
+    for args in args_list[:warmup]:
+        func(*args)
+    clock = time.perf_counter_ns
+    samples = []
+    for args in args_list:
+        start = clock()
+        func(*args)
+        samples.append(clock() - start)
+    return percentiles(samples)
+
+
+def peak_memory(func):
+    """Peak traced allocation of ``func()`` in KiB."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def _goal_system(points, analytic=False):
+    """GoalController's rule base on universes of ``points`` samples."""
+    angle = mamdani.Antecedent(np.linspace(-95, 95, points), 'angle_to_goal')
+    speed = mamdani.Consequent(np.linspace(0, 0.3, points), 'robot_speed')
+    direction = mamdani.Consequent(np.linspace(-95, 95, points), 'robot_direction')
+    for var in (angle, direction):
+        var['left'] = mamdani.trapmf(var.universe, [-95, -95, -40, 0])
+        var['center'] = mamdani.trimf(var.universe, [-40, 0, 40])
+        var['right'] = mamdani.trapmf(var.universe, [0, 40, 95, 95])
+    speed['fast'] = mamdani.trapmf(speed.universe, [0.12, 0.15, 0.2, 0.2])
+    rules = [mamdani.Rule(angle[label], [direction[label], speed['fast']])
+             for label in ('left', 'center', 'right')]
+    return mamdani.ControlSystemSimulation(mamdani.ControlSystem(rules), analytic=analytic)
+
+
+class Suite:
+    """Benchmark scenarios; ``scale`` shrinks or grows every iteration count."""
+
+    def __init__(self, seed=0, scale=1.0):
+        self.seed = seed
+        self.scale = scale
+        self.results = {}
+
+    def _n(self, count):
+        return max(1, int(count * self.scale))
+
+    def _rng(self):
+        return np.random.default_rng(self.seed)
+
+    def record(self, name, **metrics):
+        self.results[name] = {key: float(value) for key, value in metrics.items()}
+        print("{:<40} {}".format(name, "  ".join("{}={:.4g}".format(key, value)
+                                                   for key, value in metrics.items())), flush=True)
+
+    def construction(self):
+        builders = [
+            ('GoalController', lambda: GoalController()),
+            ('ObstacleController', lambda: ObstacleController()),
+            ('GoalController[compiled]', lambda: GoalController(compiled=True)),
+            ('ObstacleController[compiled]', lambda: ObstacleController(compiled=True)),
+        ]
+        for label, build in builders:
+            times = []
+            for _ in range(self._n(5)):
+                start = time.perf_counter()
+                build()
+                times.append(time.perf_counter() - start)
+            self.record('construction.' + label, median_s=np.median(times), min_s=min(times),
+                        peak_kib=peak_memory(build))
+
+    def controllers(self):
+        rng = self._rng()
+        n = self._n(2000)
+        angles = [(a,) for a in rng.uniform(-95, 95, n).tolist()]
+        pairs = list(zip(rng.uniform(-95, 95, n).tolist(), rng.uniform(0, 0.4, n).tolist()))
+        for compiled in (False, True):
+            tag = '[compiled]' if compiled else '[fuzzy]'
+            goal = GoalController(compiled=compiled)
+            obstacle = ObstacleController(compiled=compiled)
+            self.record('goal.compute' + tag, **time_calls(goal.compute, angles))
+            self.record('obstacle.compute' + tag, **time_calls(obstacle.compute, pairs))
+
+    def control_step(self):
+        """compute_fuzzy_control with a varying number of obstacles around the robot."""
+        goal, obstacle = GoalController(), ObstacleController()
+        for n_obstacles in (0, 4, 16):
+            rng = self._rng()
+            calls = []
+            for _ in range(self._n(1000)):
+                robot = rng.uniform(0.25, 1.75, 2).tolist()
+                target = rng.uniform(0.25, 1.75, 2).tolist()
+                points = [tuple(p) for p in rng.uniform(0, 2, (n_obstacles, 2)).tolist()]
+                calls.append((robot, target, points, goal, obstacle))
+            self.record('compute_fuzzy_control[obstacles={}]'.format(n_obstacles),
+                        **time_calls(compute_fuzzy_control, calls))
+
+    def resolution(self):
+        """Cost of one decision against the universe resolution, and of the table grid step."""
+        angles = [{'angle_to_goal': a} for a in self._rng().uniform(-95, 95, self._n(1000)).tolist()]
+        for analytic in (False, True):
+            for points in (48, 191, 764, 3056):
+                simulation = _goal_system(points, analytic)
+                self.record('universe[points={}{}]'.format(points, ',analytic' if analytic else ''),
+                            **time_calls(lambda kwargs: simulation.compute(**kwargs), [(a,) for a in angles]))
+
+        scalar = [(a['angle_to_goal'],) for a in angles]
+        for step in (4, 1, 0.25):
+            start = time.perf_counter()
+            goal = GoalController(compiled=True, angle_step=step, max_error=None)
+            build = time.perf_counter() - start
+            self.record('table[angle_step={}]'.format(step), build_s=build, **time_calls(goal.compute, scalar))
+
+    def batch(self):
+        """compute_batch throughput against the batch size."""
+        for tag, options in (('fuzzy', {}), ('analytic', {'analytic': True}), ('compiled', {'compiled': True})):
+            goal = GoalController(**options)
+            for size in (1, 64, 1024, 16384):
+                angles = self._rng().uniform(-95, 95, size)
+                repeat = max(1, self._n(40000) // (size * (1 if tag == 'compiled' else 50)))
+                goal.compute_batch(angles)
+                # Best of five rounds: the least disturbed by other load on the machine
+                rounds = []
+                for _ in range(5):
+                    start = time.perf_counter()
+                    for _ in range(repeat):
+                        goal.compute_batch(angles)
+                    rounds.append((time.perf_counter() - start) / repeat)
+                elapsed = min(rounds)
+                self.record('batch[{},size={}]'.format(tag, size), per_call_us=elapsed * 1e6,
+                            per_sample_us=elapsed * 1e6 / size, samples_per_s=size / elapsed,
+                            peak_kib=peak_memory(lambda: goal.compute_batch(angles)))
+
+    def arbiter(self):
+        """BlendedArbiter decisions in the goal-only, blend and obstacle-only distance ranges.
+
+        The obstacle controller runs the drafted avoidance rules, so that both
+        sides of a blend do a full inference.
+        """
+        goal, obstacle = GoalController(), ObstacleController(rule_table=OBSTACLE_RULES)
+        arbiter = BlendedArbiter(goal, obstacle)
+        n = self._n(2000)
+        for region, low, high in (('goal', arbiter.threshold, 1.0), ('blend', arbiter.blend_start, arbiter.threshold),
+                                  ('obstacle', 0.0, arbiter.blend_start)):
+            rng = self._rng()
+            inputs = (rng.uniform(-95, 95, n), rng.uniform(-90, 90, n), rng.uniform(low, high, n))
+            self.record('arbiter.compute[{}]'.format(region),
+                        **time_calls(arbiter.compute, list(zip(*(x.tolist() for x in inputs)))))
+            arbiter.compute_batch(*(x[:16] for x in inputs))
+            start = time.perf_counter()
+            arbiter.compute_batch(*inputs)
+            elapsed = time.perf_counter() - start
+            self.record('arbiter.compute_batch[{}]'.format(region), per_sample_us=elapsed * 1e6 / n)
+
+    def _engine_steps_per_s(self, engine, steps):
+        episode = 0
+        engine.reset_simulation(self.seed)
+        start = time.perf_counter()
+        for _ in range(steps):
+            if engine.step() != RUNNING:
+                episode += 1
+                engine.reset_simulation(self.seed + episode)
+        return steps / (time.perf_counter() - start)
+
+    def engine(self):
+        """Headless SimulationEngine steps/s over obstacle counts, restarting episodes from fixed seeds."""
+        steps = self._n(3000)
+        for compiled in (False, True):
+            goal, obstacle = GoalController(compiled=compiled), ObstacleController(compiled=compiled)
+            for n_obstacles in (4, 16, 64):
+                tag = '[{},obstacles={}]'.format('compiled' if compiled else 'fuzzy', n_obstacles)
+                engine = SimulationEngine(goal, obstacle, seed=self.seed, n_obstacles=n_obstacles)
+                self.record('engine.step' + tag, steps_per_s=self._engine_steps_per_s(engine, steps),
+                            peak_kib=peak_memory(lambda: self._engine_steps_per_s(engine, self._n(200))))
+
+    def batch_world(self):
+        goal, obstacle = GoalController(compiled=True), ObstacleController(compiled=True)
+        for n_episodes in (64, 1024):
+            world = BatchWorld(n_episodes, goal, obstacle, seed=self.seed)
+            steps = self._n(100)
+            start = time.perf_counter()
+            for _ in range(steps):
+                world.step()
+                if not world.running.any():
+                    world.reset(self.seed)
+            elapsed = time.perf_counter() - start
+            self.record('batch_world[episodes={}]'.format(n_episodes), steps_per_s=steps / elapsed,
+                        episode_steps_per_s=steps * n_episodes / elapsed)
+
+    def simulator(self):
+        """Full RobotSimulator iteration (physics, control and pygame drawing), without the frame cap."""
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        try:
+            import pygame
+            from simulator import RobotSimulator
+        except ImportError as error:
+            print("simulator: skipped ({})".format(error))
+            return
+        simulator = RobotSimulator(seed=self.seed)
+        steps = self._n(1000)
+        self.record('simulator.step', steps_per_s=self._engine_steps_per_s(simulator.engine, steps))
+        pygame.quit()
+
+    def cold_start(self):
+        """Fresh-process time from the first import to the first decision, as paid by short-lived workers."""
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+        for compiled in (False, True):
+            code = _COLD_START.format(compiled=compiled, heavy=HEAVY_MODULES)
+            runs = []
+            for _ in range(self._n(10)):
+                start = time.perf_counter()
+                output = subprocess.run([sys.executable, '-c', code], cwd=root, env=env, capture_output=True,
+                                        text=True, check=True).stdout
+                runs.append(json.loads(output) + [time.perf_counter() - start])
+            heavy = runs[-1][3]
+            if heavy:
+                print("cold_start: the control path imported", ", ".join(heavy))
+            import_s, build_s, decision_s, process_s = (np.median([run[i] for run in runs]) for i in (0, 1, 2, 4))
+            self.record('cold_start[{}]'.format('compiled' if compiled else 'fuzzy'),
+                        import_s=import_s, build_s=build_s, first_decision_s=decision_s,
+                        import_to_decision_s=import_s + build_s + decision_s, process_s=process_s,
+                        heavy_modules=len(heavy))
+
+    SCENARIOS = ('construction', 'controllers', 'control_step', 'resolution', 'batch', 'arbiter', 'engine',
+                 'batch_world', 'simulator', 'cold_start')
+
+    def run(self, only=None):
+        for name in self.SCENARIOS:
+            if not only or name in only:
+                getattr(self, name)()
+        return self.results
+
+
+def environment():
+    """Context stored next to a baseline so that numbers are compared like for like."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': sys.version.split()[0], 'numpy': np.__version__, 'platform': platform.platform(),
+            'machine': platform.machine(), 'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def _direction(metric):
+    """+1 if larger is better, -1 if smaller is better, 0 if not compared."""
+    if metric == 'max_us':
+        return 0  # a single outlier, too noisy to gate on
+    if metric.endswith('per_s'):
+        return 1
+    if metric.endswith(('_us', '_s', '_kib')):
+        return -1
+    return 0
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Metrics that got worse than ``baseline`` by more than ``tolerance`` (relative)."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            direction = _direction(metric)
+            if old is None or not direction or not old:
+                continue
+            change = (value - old) / old
+            if -direction * change > tolerance:
+                regressions.append((name, metric, old, value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controller and simulation benchmarks")
+    parser.add_argument('--only', nargs='+', choices=Suite.SCENARIOS, help="scenarios to run")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quick', action='store_true', help="a tenth of the iterations")
+    parser.add_argument('--save', metavar='PATH', help="write results as a JSON baseline")
+    parser.add_argument('--compare', metavar='PATH', help="baseline JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    results = Suite(args.seed, 0.1 if args.quick else 1.0).run(args.only)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'seed': args.seed, 'quick': args.quick,
+                       'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.tolerance)
+        for name, metric, old, new, change in regressions:
+            print("REGRESSION {} {}: {:.4g} -> {:.4g} ({:+.0%})".format(name, metric, old, new, change))
+        if regressions:
+            return 1
+        print("No regressions beyond {:.0%} against {}".format(args.tolerance, args.compare))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
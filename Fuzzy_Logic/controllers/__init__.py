@@ -1,3 +1,4 @@
 # controllers/__init__.py
 from .goal_controller import GoalController
-from .obstacle_controller import ObstacleController
\ No newline at end of file
+from .obstacle_controller import ObstacleController
+from .arbitration import BlendedArbiter
@@ -0,0 +1,73 @@
+# arbitration.py
+import numpy as np
+
+
+class BlendedArbiter:
+    """Fuzzy blend of the obstacle and goal controllers instead of a hard switch.
+
+    The obstacle controller's output gets the weight ``near(distance)``: 1 up to
+    ``blend_start``, falling linearly to 0 at ``threshold`` (the 0.4 switching
+    distance of compute_fuzzy_control), and the goal controller's output gets
+    the rest. Outside the blend band only one controller is evaluated, so the
+    cost there is that of today's single call; inside it both are, and their
+    outputs are mixed, which removes the jump at the threshold.
+
+    The two inferences inside the band are separate: a band decision costs
+    about as much as a goal and an obstacle decision together (the ``arbiter``
+    benchmark of benchmarks.suite). Fusing them into one pass would share
+    little, since the rule bases have different inputs and output universes.
+    """
+
+    def __init__(self, goal_controller, obstacle_controller, blend_start=0.25, threshold=0.4):
+        if not blend_start < threshold:
+            raise ValueError("blend_start must be below threshold")
+        self.goal_controller = goal_controller
+        self.obstacle_controller = obstacle_controller
+        self.blend_start = blend_start
+        self.threshold = threshold
+
+    def weight(self, distance):
+        """Membership of ``distance`` in 'near', the weight of the obstacle controller."""
+        if distance <= self.blend_start:
+            return 1.0
+        if distance >= self.threshold:
+            return 0.0
+        return (self.threshold - distance) / (self.threshold - self.blend_start)
+
+    def compute(self, angle_to_goal, obstacle_angle, obstacle_distance):
+        w = self.weight(obstacle_distance)
+        if w == 0.0:
+            return self.goal_controller.compute(angle_to_goal)
+        if w == 1.0:
+            return self.obstacle_controller.compute(obstacle_angle, obstacle_distance)
+
+        obstacle_speed, obstacle_direction = self.obstacle_controller.compute(obstacle_angle, obstacle_distance)
+        goal_speed, goal_direction = self.goal_controller.compute(angle_to_goal)
+        return (w * obstacle_speed + (1.0 - w) * goal_speed,
+                w * obstacle_direction + (1.0 - w) * goal_direction)
+
+    def weight_batch(self, distances):
+        distances = np.asarray(distances, dtype=float)
+        return np.clip((self.threshold - distances) / (self.threshold - self.blend_start), 0.0, 1.0)
+
+    def compute_batch(self, angles_to_goal, obstacle_angles, obstacle_distances):
+        """Vectorized ``compute``; each controller only sees the samples it has weight in."""
+        angles_to_goal = np.asarray(angles_to_goal, dtype=float)
+        obstacle_angles = np.asarray(obstacle_angles, dtype=float)
+        w = self.weight_batch(obstacle_distances)
+        speed = np.zeros(len(w))
+        direction = np.zeros(len(w))
+
+        goal = w < 1.0
+        if goal.any():
+            speed[goal], direction[goal] = self.goal_controller.compute_batch(angles_to_goal[goal])
+            speed[goal] *= 1.0 - w[goal]
+            direction[goal] *= 1.0 - w[goal]
+
+        near = w > 0.0
+        if near.any():
+            obstacle_speed, obstacle_direction = self.obstacle_controller.compute_batch(
+                obstacle_angles[near], np.asarray(obstacle_distances, dtype=float)[near])
+            speed[near] += w[near] * obstacle_speed
+            direction[near] += w[near] * obstacle_direction
+        return speed, direction
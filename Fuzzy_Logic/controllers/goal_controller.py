@@ -1,57 +1,78 @@
 # goal_controller.py
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+from . import mamdani
+from .inference import build_engines
+from .lookup import LookupTable
 
 
 class GoalController:
-    def __init__(self):
+    def __init__(self, compiled=False, angle_step=1, max_error=(0.005, 0.5), analytic=False,
+                 memberships=None):
         # Input variables - угол до цели
-        self.angle_to_goal = ctrl.Antecedent(np.arange(-95, 96, 1), 'angle_to_goal')
+        self.angle_to_goal = mamdani.Antecedent(np.arange(-95, 96, 1), 'angle_to_goal')
 
         # Output variables - скорость и направление движения
-        self.robot_speed = ctrl.Consequent(np.arange(0, 0.31, 0.01), 'robot_speed')
-        self.robot_direction = ctrl.Consequent(np.arange(-95, 96, 1), 'robot_direction')
+        self.robot_speed = mamdani.Consequent(np.arange(0, 0.31, 0.01), 'robot_speed')
+        self.robot_direction = mamdani.Consequent(np.arange(-95, 96, 1), 'robot_direction')
 
         self._define_memberships()
+        mamdani.apply_memberships(self, memberships)
         self._define_rules()
 
-        self.controller = ctrl.ControlSystem(self.rules)
-        self.simulation = ctrl.ControlSystemSimulation(self.controller)
+        self.controller, self.simulation, self.rule_base = build_engines(self.rules, analytic)
+
+        # Скомпилированный режим: выходы заранее посчитаны на сетке углов
+        self.table = None
+        if compiled:
+            angles = np.linspace(-95, 95, int(round(190 / angle_step)) + 1)
+            self.table = LookupTable(self._compute_fuzzy, [angles], max_error)
 
     def _define_memberships(self):
         # Более детальное разделение углов для лучшего контроля
-        self.angle_to_goal['left'] = fuzz.trapmf(self.angle_to_goal.universe, [-95, -95, -40, 0])
-        self.angle_to_goal['center'] = fuzz.trimf(self.angle_to_goal.universe, [-40, 0, 40])
-        self.angle_to_goal['right'] = fuzz.trapmf(self.angle_to_goal.universe, [0, 40, 95, 95])
+        self.angle_to_goal['left'] = mamdani.trapmf(self.angle_to_goal.universe, [-95, -95, -40, 0])
+        self.angle_to_goal['center'] = mamdani.trimf(self.angle_to_goal.universe, [-40, 0, 40])
+        self.angle_to_goal['right'] = mamdani.trapmf(self.angle_to_goal.universe, [0, 40, 95, 95])
 
         # Более плавное управление скоростью
-        self.robot_speed['slow'] = fuzz.trapmf(self.robot_speed.universe, [0, 0, 0.05, 0.12])
-        self.robot_speed['fast'] = fuzz.trapmf(self.robot_speed.universe, [0.12, 0.15, 0.2, 0.2])
+        self.robot_speed['slow'] = mamdani.trapmf(self.robot_speed.universe, [0, 0, 0.05, 0.12])
+        self.robot_speed['fast'] = mamdani.trapmf(self.robot_speed.universe, [0.12, 0.15, 0.2, 0.2])
 
         # Более точное управление поворотами
-        self.robot_direction['left'] = fuzz.trapmf(self.robot_direction.universe, [-95, -95, -40, 0])
-        self.robot_direction['center'] = fuzz.trimf(self.robot_direction.universe, [-40, 0, 40])
-        self.robot_direction['right'] = fuzz.trapmf(self.robot_direction.universe, [0, 40, 95, 95])
+        self.robot_direction['left'] = mamdani.trapmf(self.robot_direction.universe, [-95, -95, -40, 0])
+        self.robot_direction['center'] = mamdani.trimf(self.robot_direction.universe, [-40, 0, 40])
+        self.robot_direction['right'] = mamdani.trapmf(self.robot_direction.universe, [0, 40, 95, 95])
 
     def _define_rules(self):
         self.rules = [
             # Правила для случая, когда цель находится прямо впереди
-            ctrl.Rule(self.angle_to_goal['center'],
-                      [self.robot_direction['center'], self.robot_speed['fast']]),
+            mamdani.Rule(self.angle_to_goal['center'],
+                         [self.robot_direction['center'], self.robot_speed['fast']]),
 
             # Правила в случае, когда цель справа или слева от робота
-            ctrl.Rule(self.angle_to_goal['right'],
-                      [self.robot_direction['right'], self.robot_speed['fast']]),
-            ctrl.Rule(self.angle_to_goal['left'],
-                      [self.robot_direction['left'], self.robot_speed['fast']]),
+            mamdani.Rule(self.angle_to_goal['right'],
+                         [self.robot_direction['right'], self.robot_speed['fast']]),
+            mamdani.Rule(self.angle_to_goal['left'],
+                         [self.robot_direction['left'], self.robot_speed['fast']]),
         ]
 
     def compute(self, angle):
-        try:
-            self.simulation.input['angle_to_goal'] = angle
-            self.simulation.compute()
-            return (self.simulation.output['robot_speed'],
-                    self.simulation.output['robot_direction'])
-        except:
+        if self.table is not None:
+            return self.table(angle)
+        return self._compute_fuzzy(angle)
+
+    def _compute_fuzzy(self, angle):
+        outputs = self.simulation.compute(angle_to_goal=angle)
+        if outputs is None:
             return 15, angle
+        return outputs['robot_speed'], outputs['robot_direction']
+
+    def compute_batch(self, angles):
+        """Vectorized ``compute`` over an array of angles."""
+        angles = np.asarray(angles, dtype=float)
+        if self.table is not None:
+            return self.table.lookup_batch(angles)
+        outputs, valid = self.rule_base.compute_batch(angle_to_goal=angles)
+        speed = np.where(valid, outputs['robot_speed'], 15)
+        direction = np.where(valid, outputs['robot_direction'], angles)
+        return speed, direction
@@ -0,0 +1,190 @@
+# inference.py
+import numpy as np
+from .mamdani import AnalyticCentroid, ControlSystem, ControlSystemSimulation
+
+
+class RuleBase:
+    """Array form of a fuzzy control system for batched Mamdani inference.
+
+    The variables, terms and rules are read once from a ``ControlSystem``
+    (``controllers.mamdani`` or skfuzzy). ``compute_batch`` then runs fuzzification, rule firing
+    (min/max), accumulation and centroid defuzzification over whole arrays of
+    inputs, following the same steps as ``ControlSystemSimulation.compute``
+    (including the upsampling of each output universe at the cut levels), so
+    the results agree with the scalar path to floating point rounding.
+
+    ``analytic=True`` defuzzifies with the closed-form AnalyticCentroid
+    instead (``AnalyticCentroid.batch``, over all samples at once), like
+    ``ControlSystemSimulation(analytic=True)``; the output terms must then be
+    trimf/trapmf terms of ``controllers.mamdani``.
+    """
+
+    def __init__(self, control_system, chunk_size=4096, analytic=False):
+        self.chunk_size = chunk_size
+        self.inputs = {}
+        self.outputs = {}
+        self.rules = []
+        output_vars = {}
+
+        for rule in control_system.rules:
+            antecedent = self._compile_antecedent(rule.antecedent)
+            consequents = []
+            for weighted in rule.consequent:
+                term = weighted.term
+                self._add_variable(self.outputs, term.parent)
+                output_vars[term.parent.label] = term.parent
+                consequents.append((term.parent.label, term.label, weighted.weight))
+            self.rules.append((antecedent, consequents))
+
+        # Output terms that are never fired by a rule take no part in defuzzification
+        self._fired = {label: [] for label in self.outputs}
+        for _, consequents in self.rules:
+            for output, term, _ in consequents:
+                if term not in self._fired[output]:
+                    self._fired[output].append(term)
+
+        self._centroids = None
+        if analytic:
+            self._centroids = {}
+            for label, var in output_vars.items():
+                shapes = [getattr(var.terms[term], 'breakpoints', None) for term in self._fired[label]]
+                if any(shape is None for shape in shapes):
+                    raise ValueError("Analytic defuzzification needs trimf/trapmf terms for '{}'".format(label))
+                self._centroids[label] = AnalyticCentroid(var.universe[0], var.universe[-1], shapes)
+
+    @staticmethod
+    def _add_variable(variables, var):
+        if var.label not in variables:
+            universe = np.asarray(var.universe, dtype=float)
+            terms = {label: np.asarray(term.mf, dtype=float) for label, term in var.terms.items()}
+            variables[var.label] = (universe, terms)
+
+    def _compile_antecedent(self, node):
+        kind = getattr(node, 'kind', None)
+        if kind is None:
+            self._add_variable(self.inputs, node.parent)
+            return 'term', node.parent.label, node.label
+        if kind == 'not':
+            return 'not', self._compile_antecedent(node.term1)
+        return kind, self._compile_antecedent(node.term1), self._compile_antecedent(node.term2)
+
+    def compute_batch(self, **inputs):
+        """Run inference for arrays of crisp inputs given by variable label.
+
+        Returns ``(outputs, valid)``: a dict of crisp output arrays and a
+        boolean mask of the samples for which every output could be
+        defuzzified. Invalid samples are those where skfuzzy would raise
+        (no rules, unknown input, empty aggregated membership); their output
+        values are NaN.
+        """
+        arrays = {label: np.asarray(value, dtype=float) for label, value in inputs.items()}
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else ()
+        arrays = {label: np.broadcast_to(a, shape).ravel() for label, a in arrays.items()}
+        size = int(np.prod(shape))
+
+        outputs = {label: np.full(size, np.nan) for label in self.outputs}
+        valid = np.zeros(size, dtype=bool)
+
+        if self.rules and set(arrays) == set(self.inputs):
+            for start in range(0, size, self.chunk_size):
+                chunk = slice(start, start + self.chunk_size)
+                values, ok = self._compute_chunk({label: a[chunk] for label, a in arrays.items()})
+                for label in outputs:
+                    outputs[label][chunk] = values[label]
+                valid[chunk] = ok
+
+        return ({label: value.reshape(shape) for label, value in outputs.items()},
+                valid.reshape(shape))
+
+    def _compute_chunk(self, inputs):
+        # Fuzzification (inputs are clipped to the universe like skfuzzy does)
+        memberships = {}
+        for label, (universe, terms) in self.inputs.items():
+            x = np.clip(inputs[label], universe[0], universe[-1])
+            memberships[label] = {term: np.interp(x, universe, mf) for term, mf in terms.items()}
+
+        # Rule firing and accumulation of the cuts per output term
+        cuts = {label: {} for label in self.outputs}
+        for antecedent, consequents in self.rules:
+            strength = self._evaluate(antecedent, memberships)
+            for output, term, weight in consequents:
+                activation = strength * weight
+                previous = cuts[output].get(term)
+                cuts[output][term] = activation if previous is None else np.fmax(activation, previous)
+
+        values = {}
+        valid = np.ones(len(next(iter(inputs.values()))), dtype=bool)
+        for label, (universe, terms) in self.outputs.items():
+            fired = [(terms[term], cuts[label][term]) for term in self._fired[label]]
+            if self._centroids is not None:
+                values[label], ok = self._defuzzify_analytic(self._centroids[label], fired)
+            else:
+                values[label], ok = self._defuzzify(universe, fired)
+            valid &= ok
+        return values, valid
+
+    def _evaluate(self, node, memberships):
+        kind = node[0]
+        if kind == 'term':
+            return memberships[node[1]][node[2]]
+        if kind == 'not':
+            return 1.0 - self._evaluate(node[1], memberships)
+        first = self._evaluate(node[1], memberships)
+        second = self._evaluate(node[2], memberships)
+        return np.fmin(first, second) if kind == 'and' else np.fmax(first, second)
+
+    @staticmethod
+    def _defuzzify_analytic(centroid, fired):
+        result = centroid.batch(np.column_stack([cut for _, cut in fired]))
+        return result, ~np.isnan(result)
+
+    @staticmethod
+    def _defuzzify(universe, fired):
+        batch = len(fired[0][1])
+        dx = universe[1:] - universe[:-1]
+
+        # Upsample the universe with the points where each term crosses its cut
+        points = [np.broadcast_to(universe, (batch, len(universe)))]
+        for mf, cut in fired:
+            c = cut[:, None]
+            above = (mf >= c) & ((mf > 0.0) | (c != 0.0))
+            crossing = above[:, 1:] != above[:, :-1]
+            dmf = mf[1:] - mf[:-1]
+            # Only a few segments cross per row: gather them into a narrow array
+            rows, cols = np.nonzero(crossing)
+            counts = np.bincount(rows, minlength=batch)
+            slots = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+            extra = np.full((batch, counts.max(initial=0)), universe[-1])
+            extra[rows, slots] = (universe[cols]
+                                  + (cut[rows] - mf[cols]) * dx[cols] / dmf[cols])
+            points.append(extra)
+        x = np.sort(np.concatenate(points, axis=1), axis=1)
+
+        # Aggregate the clipped output terms on the upsampled universe
+        y = np.zeros_like(x)
+        for mf, cut in fired:
+            np.fmax(y, np.fmin(cut[:, None], np.interp(x, universe, mf)), out=y)
+
+        # Piecewise-linear centroid: every segment is a trapezoid, whose area and
+        # first moment have a closed form (same integral as skfuzzy's centroid)
+        x1 = x[:, :-1]
+        width = x[:, 1:] - x1
+        y1, y2 = y[:, :-1], y[:, 1:]
+        area = 0.5 * width * (y1 + y2)
+        moment_area = width * width * (y2 + 0.5 * y1) / 3.0 + x1 * area
+
+        sum_area = area.sum(axis=1)
+        result = moment_area.sum(axis=1) / np.fmax(sum_area, np.finfo(float).eps)
+        valid = y.sum(axis=1) != 0
+        return np.where(valid, result, np.nan), valid
+
+
+def build_engines(rules, analytic=False):
+    """ControlSystem of ``rules`` with its scalar simulation and batched RuleBase.
+
+    ``analytic=True`` makes both defuzzify with the exact centroid of the
+    term shapes instead of sampling the output universes.
+    """
+    control_system = ControlSystem(rules)
+    return (control_system, ControlSystemSimulation(control_system, analytic=analytic),
+            RuleBase(control_system, analytic=analytic))
@@ -0,0 +1,115 @@
+# lookup.py
+import numpy as np
+
+
+class LookupTable:
+    """Controller outputs precomputed on a regular grid of inputs.
+
+    ``func`` maps one point of the input space to a ``(speed, direction)``
+    pair. It is sampled once at every grid node; lookups then interpolate
+    linearly (1-D) or bilinearly (2-D) between the surrounding nodes, so a
+    call costs a few arithmetic operations instead of a full fuzzy inference.
+
+    If ``max_error`` is given as ``(speed_error, direction_error)``, ``func``
+    is also evaluated at the centre of every grid cell and a ``ValueError`` is
+    raised when the interpolated result deviates from it by more than the
+    bound. The measured deviation is kept in ``self.error``.
+
+    Inputs beyond the grid are clamped to its edge; NaN inputs raise
+    ``ValueError``.
+    """
+
+    def __init__(self, func, axes, max_error=None):
+        if len(axes) not in (1, 2):
+            raise ValueError("Only 1-D and 2-D lookup tables are supported")
+
+        self.axes = []
+        for axis in axes:
+            axis = np.asarray(axis, dtype=float)
+            steps = np.diff(axis)
+            if axis.ndim != 1 or len(axis) < 2 or not np.allclose(steps, steps[0]):
+                raise ValueError("Lookup table axes must be uniform 1-D grids")
+            self.axes.append(axis)
+
+        # Grid parameters as plain floats for fast scalar lookups
+        self._starts = [float(axis[0]) for axis in self.axes]
+        self._ends = [float(axis[-1]) for axis in self.axes]
+        self._steps = [float(axis[1] - axis[0]) for axis in self.axes]
+        self._sizes = [len(axis) for axis in self.axes]
+
+        self.values = self._sample(func, self.axes)
+        self._speed = self.values[..., 0].tolist()
+        self._direction = self.values[..., 1].tolist()
+
+        self.error = None
+        if max_error is not None:
+            self.error = self._measure_error(func)
+            if np.any(self.error > np.asarray(max_error)):
+                raise ValueError("Lookup table error {} exceeds the bound {}; "
+                                 "use a finer grid".format(tuple(self.error), tuple(max_error)))
+
+    @staticmethod
+    def _sample(func, axes):
+        grids = np.meshgrid(*axes, indexing='ij')
+        points = zip(*(grid.ravel().tolist() for grid in grids))
+        values = np.array([func(*point) for point in points], dtype=float)
+        return values.reshape(grids[0].shape + (2,))
+
+    def _measure_error(self, func):
+        centers = [(axis[:-1] + axis[1:]) / 2 for axis in self.axes]
+        exact = self._sample(func, centers)
+        approx = self._sample(self, centers)
+        return np.abs(exact - approx).reshape(-1, 2).max(axis=0)
+
+    def _locate(self, dim, x):
+        # Clamp to the grid the same way skfuzzy clips inputs to the universe
+        if x <= self._starts[dim]:
+            return 0, 0.0
+        if x >= self._ends[dim]:
+            return self._sizes[dim] - 2, 1.0
+        if x != x:
+            raise ValueError("Lookup table input is NaN")
+        t = (x - self._starts[dim]) / self._steps[dim]
+        i = min(int(t), self._sizes[dim] - 2)
+        return i, t - i
+
+    def __call__(self, *point):
+        if len(self.axes) == 1:
+            i, fx = self._locate(0, point[0])
+            speed, direction = self._speed, self._direction
+            return (speed[i] + (speed[i + 1] - speed[i]) * fx,
+                    direction[i] + (direction[i + 1] - direction[i]) * fx)
+
+        i, fx = self._locate(0, point[0])
+        j, fy = self._locate(1, point[1])
+        return (self._bilinear(self._speed, i, j, fx, fy),
+                self._bilinear(self._direction, i, j, fx, fy))
+
+    @staticmethod
+    def _bilinear(table, i, j, fx, fy):
+        row0, row1 = table[i], table[i + 1]
+        low = row0[j] + (row1[j] - row0[j]) * fx
+        high = row0[j + 1] + (row1[j + 1] - row0[j + 1]) * fx
+        return low + (high - low) * fy
+
+    def lookup_batch(self, *points):
+        """Vectorized lookup for arrays of inputs; returns speed and direction arrays."""
+        indices = []
+        for dim, x in enumerate(np.broadcast_arrays(*(np.asarray(p, dtype=float) for p in points))):
+            if np.isnan(x).any():
+                raise ValueError("Lookup table input is NaN")
+            t = np.clip((x - self._starts[dim]) / self._steps[dim], 0, self._sizes[dim] - 1)
+            i = np.minimum(np.floor(t).astype(int), self._sizes[dim] - 2)
+            indices.append((i, t - i))
+
+        if len(self.axes) == 1:
+            (i, fx), = indices
+            low, high = self.values[i], self.values[i + 1]
+            result = low + (high - low) * fx[..., None]
+        else:
+            (i, fx), (j, fy) = indices
+            fx, fy = fx[..., None], fy[..., None]
+            low = self.values[i, j] + (self.values[i + 1, j] - self.values[i, j]) * fx
+            high = self.values[i, j + 1] + (self.values[i + 1, j + 1] - self.values[i, j + 1]) * fx
+            result = low + (high - low) * fy
+        return result[..., 0], result[..., 1]
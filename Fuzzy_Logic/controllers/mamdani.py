@@ -0,0 +1,607 @@
+# mamdani.py
+"""Lean Mamdani inference engine for the robot controllers.
+
+Mirrors the small part of ``skfuzzy.control`` the controllers use
+(Antecedent/Consequent terms, ``&``/``|``/``~`` rules, min/max inference and
+centroid defuzzification) without its networkx rule graph, per-call state
+bookkeeping or exceptions. Results agree with skfuzzy to floating point
+rounding; ``compare_with_skfuzzy`` checks that on a set of inputs.
+
+With ``analytic=True`` the centroid is instead integrated in closed form over
+the exact piecewise-linear shapes of trimf/trapmf output terms, at a cost
+that depends on the number of terms rather than of universe points.
+"""
+from bisect import bisect_right
+import numpy as np
+
+_EPS = float(np.finfo(float).eps)
+
+
+class _ShapedMF(np.ndarray):
+    """Sampled membership function that remembers its exact shape as (x, y) breakpoints."""
+    breakpoints = None
+
+
+def _shaped(y, breakpoints):
+    y = y.view(_ShapedMF)
+    y.breakpoints = tuple((float(x), float(v)) for x, v in breakpoints)
+    return y
+
+
+def trimf(x, abc):
+    """Triangular membership function, identical to ``skfuzzy.trimf``."""
+    a, b, c = abc
+    assert a <= b <= c, 'abc requires the three elements a <= b <= c.'
+    x = np.asarray(x, dtype=float)
+    y = np.zeros(len(x))
+    # Left side
+    if a != b:
+        idx = np.nonzero((a < x) & (x < b))[0]
+        y[idx] = (x[idx] - a) / float(b - a)
+    # Right side
+    if b != c:
+        idx = np.nonzero((b < x) & (x < c))[0]
+        y[idx] = (c - x[idx]) / float(c - b)
+    y[x == b] = 1
+    return _shaped(y, [(a, 0), (b, 1), (c, 0)])
+
+
+def trapmf(x, abcd):
+    """Trapezoidal membership function, identical to ``skfuzzy.trapmf``."""
+    a, b, c, d = abcd
+    assert a <= b <= c <= d, 'abcd requires the four elements a <= b <= c <= d.'
+    x = np.asarray(x, dtype=float)
+    y = np.ones(len(x))
+    idx = np.nonzero(x <= b)[0]
+    y[idx] = trimf(x[idx], [a, b, b])
+    idx = np.nonzero(x >= c)[0]
+    y[idx] = trimf(x[idx], [c, c, d])
+    y[x < a] = 0
+    y[x > d] = 0
+    return _shaped(y, [(a, 0), (b, 1), (c, 1), (d, 0)])
+
+
+def membership(x, params):
+    """trimf for three breakpoints, trapmf for four."""
+    if len(params) == 3:
+        return trimf(x, params)
+    if len(params) == 4:
+        return trapmf(x, params)
+    raise ValueError("Expected 3 (trimf) or 4 (trapmf) breakpoints, got {}".format(len(params)))
+
+
+def apply_memberships(controller, memberships):
+    """Override terms of a controller's variables: ``{variable: {term: breakpoints}}``."""
+    for variable, terms in (memberships or {}).items():
+        var = getattr(controller, variable)
+        for term, params in terms.items():
+            var[term] = membership(var.universe, params)
+
+
+class Term:
+    """A named membership function of a fuzzy variable.
+
+    ``breakpoints`` is the exact piecewise-linear shape for terms made with
+    trimf/trapmf, None for arbitrary sampled membership functions.
+    """
+
+    def __init__(self, label, parent, mf, breakpoints=None):
+        self.label = label
+        self.parent = parent
+        self.mf = mf
+        self.breakpoints = breakpoints
+
+    def __and__(self, other):
+        return TermAggregate(self, other, 'and')
+
+    def __or__(self, other):
+        return TermAggregate(self, other, 'or')
+
+    def __invert__(self):
+        return TermAggregate(self, None, 'not')
+
+    def __repr__(self):
+        return "{}[{}]".format(self.parent.label, self.label)
+
+
+class TermAggregate(Term):
+    """AND/OR/NOT combination of terms in a rule antecedent."""
+
+    def __init__(self, term1, term2, kind):
+        self.term1 = term1
+        self.term2 = term2
+        self.kind = kind
+
+
+class WeightedTerm:
+    """Consequent term of a rule with its weight."""
+
+    def __init__(self, term, weight=1.0):
+        self.term = term
+        self.weight = weight
+
+
+class FuzzyVariable:
+    def __init__(self, universe, label):
+        self.universe = np.asarray(universe, dtype=float)
+        self.label = label
+        self.terms = {}
+
+    def __getitem__(self, label):
+        return self.terms[label]
+
+    def __setitem__(self, label, mf):
+        breakpoints = getattr(mf, 'breakpoints', None)
+        mf = np.array(mf, dtype=float)
+        if mf.shape != self.universe.shape:
+            raise ValueError("Membership function of '{}' must match the universe of '{}'"
+                             .format(label, self.label))
+        self.terms[label] = Term(label, self, mf, breakpoints)
+
+
+class Antecedent(FuzzyVariable):
+    pass
+
+
+class Consequent(FuzzyVariable):
+    pass
+
+
+class Rule:
+    def __init__(self, antecedent, consequent):
+        self.antecedent = antecedent
+        if isinstance(consequent, (Term, WeightedTerm)):
+            consequent = [consequent]
+        self.consequent = [c if isinstance(c, WeightedTerm) else WeightedTerm(c) for c in consequent]
+
+
+class ControlSystem:
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+
+    def to_skfuzzy(self):
+        """Build the equivalent ``skfuzzy.control.ControlSystem`` (reference implementation)."""
+        from skfuzzy import control as ctrl
+
+        variables = {}
+
+        def convert_variable(var):
+            if var.label not in variables:
+                kind = ctrl.Antecedent if isinstance(var, Antecedent) else ctrl.Consequent
+                converted = kind(var.universe, var.label)
+                for label, term in var.terms.items():
+                    converted[label] = term.mf
+                variables[var.label] = converted
+            return variables[var.label]
+
+        def convert_antecedent(node):
+            if isinstance(node, TermAggregate):
+                if node.kind == 'not':
+                    return ~convert_antecedent(node.term1)
+                first, second = convert_antecedent(node.term1), convert_antecedent(node.term2)
+                return first & second if node.kind == 'and' else first | second
+            return convert_variable(node.parent)[node.label]
+
+        rules = []
+        for rule in self.rules:
+            consequents = [convert_variable(c.term.parent)[c.term.label] % c.weight for c in rule.consequent]
+            rules.append(ctrl.Rule(convert_antecedent(rule.antecedent), consequents))
+        return ctrl.ControlSystem(rules)
+
+
+class _OutputBuffers:
+    """Preallocated arrays for defuzzifying one consequent."""
+
+    def __init__(self, var, fired):
+        self.label = var.label
+        self.universe = var.universe
+        self.fired = fired
+        self.mfs = np.array([var.terms[label].mf for label in fired])
+        self.dx = np.diff(self.universe)
+        self.dmf = np.diff(self.mfs, axis=1)
+
+        n_terms, size = self.mfs.shape
+        self.cuts = np.zeros(n_terms)
+        self.clipped = np.empty((n_terms, size))
+        self.aggregated = np.empty(size)
+        self.above = np.empty((n_terms, size), dtype=bool)
+        self.positive = self.mfs > 0.0
+        self.crossing = np.empty((n_terms, size - 1), dtype=bool)
+        self.segment = np.empty(size - 1)
+        self.area = np.empty(size - 1)
+        self.moment = np.empty(size - 1)
+
+        # Python copies for the per-crossing scalar arithmetic
+        self._u = self.universe.tolist()
+        self._mf = self.mfs.tolist()
+        self._dx = self.dx.tolist()
+        self._dmf = self.dmf.tolist()
+
+    def defuzzify(self):
+        """Centroid of the aggregated output for the cuts in ``self.cuts``, or None if empty.
+
+        Equivalent to skfuzzy's upsampling of the universe at every point where
+        a term crosses its cut followed by piecewise-linear centroid: the
+        trapezoids over the plain universe are summed in bulk, and only the few
+        segments containing a crossing are split and re-summed in Python.
+        """
+        cuts = self.cuts
+        cut_column = cuts[:, None]
+        np.minimum(self.mfs, cut_column, out=self.clipped)
+        np.maximum.reduce(self.clipped, axis=0, out=self.aggregated)
+        y = self.aggregated
+        if not y.any():
+            return None
+
+        # Trapezoid area and first moment of every universe segment
+        x1 = self.universe[:-1]
+        np.add(y[:-1], y[1:], out=self.segment)
+        np.multiply(self.segment, self.dx, out=self.area)
+        self.area *= 0.5
+        np.multiply(y[:-1], 0.5, out=self.moment)
+        self.moment += y[1:]
+        self.moment *= self.dx
+        self.moment *= self.dx
+        self.moment /= 3.0
+        np.multiply(x1, self.area, out=self.segment)
+        self.moment += self.segment
+        sum_area = float(np.add.reduce(self.area))
+        sum_moment = float(np.add.reduce(self.moment))
+
+        # Points where a term crosses its cut (zero cuts: where the term becomes positive)
+        np.greater_equal(self.mfs, cut_column, out=self.above)
+        zero = cuts == 0.0
+        if zero.any():
+            self.above[zero] &= self.positive[zero]
+        np.not_equal(self.above[:, 1:], self.above[:, :-1], out=self.crossing)
+        terms, segments = np.nonzero(self.crossing)
+        if len(segments):
+            splits = {}
+            for t, j in zip(terms.tolist(), segments.tolist()):
+                x = self._u[j] + (float(cuts[t]) - self._mf[t][j]) * self._dx[j] / self._dmf[t][j]
+                splits.setdefault(j, []).append(x)
+            cut_list = cuts.tolist()
+            for j, points in splits.items():
+                sum_area -= float(self.area[j])
+                sum_moment -= float(self.moment[j])
+                area, moment = self._split_segment(j, sorted(points), cut_list)
+                sum_area += area
+                sum_moment += moment
+
+        return sum_moment / max(sum_area, _EPS)
+
+    def _split_segment(self, j, points, cuts):
+        u0, u1, dx = self._u[j], self._u[j + 1], self._dx[j]
+        xs = [u0] + points + [u1]
+        ys = [float(self.aggregated[j])]
+        for x in points:
+            ys.append(max(min(cut, (mf[j + 1] - mf[j]) / dx * (x - u0) + mf[j])
+                          for cut, mf in zip(cuts, self._mf)))
+        ys.append(float(self.aggregated[j + 1]))
+
+        area = moment = 0.0
+        for k in range(len(xs) - 1):
+            x1, width = xs[k], xs[k + 1] - xs[k]
+            y1, y2 = ys[k], ys[k + 1]
+            segment_area = 0.5 * width * (y1 + y2)
+            area += segment_area
+            moment += width * width * (y2 + 0.5 * y1) / 3.0 + x1 * segment_area
+        return area, moment
+
+
+class AnalyticCentroid:
+    """Exact centroid of ``max_t min(f_t, cut_t)`` over ``[low, high]``.
+
+    ``shapes`` are the breakpoint lists of piecewise-linear terms ``f_t`` (zero
+    outside their first and last breakpoint). The aggregate is linear between
+    the term breakpoints, the points where a term crosses its cut and the
+    points where two clipped terms intersect, so its area and first moment
+    are summed exactly over those pieces.
+    """
+
+    def __init__(self, low, high, shapes):
+        self.low = float(low)
+        self.high = float(high)
+        self.shapes = []
+        for shape in shapes:
+            xs = [x for x, _ in shape]
+            ys = [y for _, y in shape]
+            slopes = [(y1 - y0) / (x1 - x0) if x1 > x0 else 0.0
+                      for x0, x1, y0, y1 in zip(xs, xs[1:], ys, ys[1:])]
+            inside = [x for x in xs if self.low < x < self.high]
+            self.shapes.append((xs, ys, slopes, inside))
+
+        # Arrays for ``batch``: every inside breakpoint, and the sloped segments with their term
+        self._inside = np.unique([x for shape in self.shapes for x in shape[3]])
+        segments = np.array([(t, xs[k], ys[k], ys[k + 1], slope)
+                             for t, (xs, ys, slopes, _) in enumerate(self.shapes)
+                             for k, slope in enumerate(slopes) if slope], dtype=float).reshape(-1, 5)
+        self._segment_term = segments[:, 0].astype(int)
+        self._segment_x, self._segment_y0, self._segment_y1, self._segment_slope = segments[:, 1:].T
+        self._arrays = [(np.asarray(xs), np.asarray(ys), np.asarray(slopes)) for xs, ys, slopes, _ in self.shapes]
+        # Only terms whose supports overlap can cross while both are above zero
+        self._pairs = np.array([(i, j) for i in range(len(self.shapes)) for j in range(i + 1, len(self.shapes))
+                                if max(self.shapes[i][0][0], self.shapes[j][0][0]) <
+                                min(self.shapes[i][0][-1], self.shapes[j][0][-1])], dtype=int).reshape(-1, 2).T
+
+    def __call__(self, cuts):
+        """Centroid for the given cut of every term (terms with cut <= 0 are off), or None if empty."""
+        active = [(shape, cut) for shape, cut in zip(self.shapes, cuts) if cut > 0.0]
+        if not active:
+            return None
+
+        low, high = self.low, self.high
+        points = {low, high}
+        for (xs, ys, slopes, inside), cut in active:
+            points.update(inside)
+            for k, slope in enumerate(slopes):
+                y0, y1 = ys[k], ys[k + 1]
+                # (vertical edges cross at a breakpoint, which is already a point)
+                if slope and (y0 - cut) * (y1 - cut) < 0.0:
+                    x = xs[k] + (cut - y0) / slope
+                    if low < x < high:
+                        points.add(x)
+        points = sorted(points)
+
+        area = moment = 0.0
+        for a, b in zip(points, points[1:]):
+            # Every clipped term is a straight line on [a, b]: keep its end values
+            middle = 0.5 * (a + b)
+            lines = []
+            for (xs, ys, slopes, _), cut in active:
+                k = bisect_right(xs, middle) - 1
+                if 0 <= k < len(slopes):
+                    y0 = ys[k] + slopes[k] * (a - xs[k])
+                    y1 = ys[k] + slopes[k] * (b - xs[k])
+                    lines.append((y0 if y0 < cut else cut, y1 if y1 < cut else cut))
+            if not lines:
+                continue
+
+            # The upper envelope can only bend where two lines cross
+            ts = [1.0]
+            for i in range(len(lines) - 1):
+                for j in range(i + 1, len(lines)):
+                    da = lines[i][0] - lines[j][0]
+                    db = lines[i][1] - lines[j][1]
+                    if da * db < 0.0:
+                        ts.append(da / (da - db))
+            if len(ts) > 1:
+                ts.sort()
+
+            width = b - a
+            x1 = a
+            y1 = max(ya for ya, _ in lines)
+            for t in ts:
+                x2 = a + t * width
+                y2 = max(ya + (yb - ya) * t for ya, yb in lines) if t < 1.0 else max(yb for _, yb in lines)
+                w = x2 - x1
+                segment_area = 0.5 * w * (y1 + y2)
+                area += segment_area
+                moment += w * w * (y2 + 0.5 * y1) / 3.0 + x1 * segment_area
+                x1, y1 = x2, y2
+
+        if area <= 0.0:
+            return None
+        return moment / area
+
+    def batch(self, cuts, chunk_size=256):
+        """``__call__`` over an (N, terms) array of cuts; returns (N,) centroids, NaN where empty.
+
+        The same pieces are integrated for all samples at once: the split
+        points are the union of every term's breakpoints and cut crossings
+        (unused ones collapse onto ``high``), and on every interval the upper
+        envelope is evaluated at all pairwise crossings of overlapping clipped
+        terms. Memory grows with ``chunk_size`` x intervals x term pairs.
+        """
+        cuts = np.asarray(cuts, dtype=float)
+        result = np.full(len(cuts), np.nan)
+        # Samples where no term is active have no centroid
+        rows = np.flatnonzero((cuts > 0.0).any(axis=1))
+        if len(rows) <= 8:
+            # A few samples are cheaper one by one than through the array setup
+            for row in rows.tolist():
+                result[row] = self(cuts[row].tolist())
+            return result
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            result[chunk] = self._batch_chunk(cuts[chunk])
+        return result
+
+    def _batch_chunk(self, cuts):
+        n = len(cuts)
+        low, high = self.low, self.high
+        active = cuts > 0.0
+
+        # Split points: the universe ends, breakpoints, and where active terms cross their cut
+        cut = cuts[:, self._segment_term]
+        y0, y1 = self._segment_y0, self._segment_y1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = self._segment_x + (cut - y0) / self._segment_slope
+        crossing = np.where(active[:, self._segment_term] & ((y0 - cut) * (y1 - cut) < 0.0)
+                            & (crossing > low) & (crossing < high), crossing, high)
+        points = np.concatenate([np.full((n, 1), low), np.broadcast_to(self._inside, (n, len(self._inside))),
+                                 crossing, np.full((n, 1), high)], axis=1)
+        points.sort(axis=1)
+        # Unused crossings sorted to the end make empty intervals at ``high``: drop them
+        points = points[:, :int((points < high).sum(axis=1).max()) + 1]
+        a, b = points[:, :-1], points[:, 1:]
+        middle = 0.5 * (a + b)
+
+        # Every clipped term is a straight line on each interval: its values at both ends
+        starts = np.zeros(a.shape + (len(self.shapes),))
+        ends = np.zeros_like(starts)
+        for t, (xs, ys, slopes) in enumerate(self._arrays):
+            if not len(slopes) or not active[:, t].any():
+                continue
+            k = np.searchsorted(xs, middle, side='right') - 1
+            covered = (k >= 0) & (k < len(slopes)) & active[:, t, None]
+            k = np.clip(k, 0, len(slopes) - 1)
+            x0, y0, slope, cap = xs[k], ys[k], slopes[k], cuts[:, t, None]
+            starts[..., t] = np.where(covered, np.minimum(y0 + slope * (a - x0), cap), 0.0)
+            ends[..., t] = np.where(covered, np.minimum(y0 + slope * (b - x0), cap), 0.0)
+
+        # The upper envelope can only bend where two lines cross
+        first, second = self._pairs
+        da = starts[..., first] - starts[..., second]
+        db = ends[..., first] - ends[..., second]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ts = np.where(da * db < 0.0, da / (da - db), 1.0)
+        ts = np.concatenate([np.zeros(a.shape + (1,)), ts, np.ones(a.shape + (1,))], axis=-1)
+        ts.sort(axis=-1)
+        y = (starts[..., None, :] + (ends - starts)[..., None, :] * ts[..., None]).max(axis=-1)
+        x = a[..., None] + ts * (b - a)[..., None]
+
+        x1, w = x[..., :-1], np.diff(x, axis=-1)
+        y1, y2 = y[..., :-1], y[..., 1:]
+        segment_area = 0.5 * w * (y1 + y2)
+        area = segment_area.sum(axis=(1, 2))
+        moment = (w * w * (y2 + 0.5 * y1) / 3.0 + x1 * segment_area).sum(axis=(1, 2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(area > 0.0, moment / area, np.nan)
+
+
+class _AnalyticOutput:
+    """Closed-form defuzzification of one consequent, same interface as _OutputBuffers."""
+
+    def __init__(self, var, fired):
+        shapes = []
+        for label in fired:
+            breakpoints = var.terms[label].breakpoints
+            if breakpoints is None:
+                raise ValueError("Analytic defuzzification needs trimf/trapmf terms; '{}' of '{}' is sampled"
+                                 .format(label, var.label))
+            shapes.append(breakpoints)
+        self.label = var.label
+        self.fired = fired
+        self.cuts = np.zeros(len(fired))
+        self.centroid = AnalyticCentroid(var.universe[0], var.universe[-1], shapes)
+
+    def defuzzify(self):
+        return self.centroid(self.cuts.tolist())
+
+
+class ControlSystemSimulation:
+    """Scalar Mamdani inference over a ControlSystem with preallocated buffers.
+
+    ``compute(**inputs)`` takes crisp inputs by variable label and returns a
+    dict of crisp outputs, or None where skfuzzy would fail (no rules, unknown
+    or missing inputs, empty aggregated membership). ``analytic=True`` uses
+    closed-form centroids of the exact term shapes (see AnalyticCentroid)
+    instead of the sampled universe.
+    """
+
+    def __init__(self, control_system, analytic=False):
+        self.inputs = {}
+        self.rules = []
+        outputs = {}
+        fired = {}
+
+        for rule in control_system.rules:
+            antecedent = self._compile_antecedent(rule.antecedent)
+            consequents = []
+            for weighted in rule.consequent:
+                var = weighted.term.parent
+                outputs.setdefault(var.label, var)
+                labels = fired.setdefault(var.label, [])
+                if weighted.term.label not in labels:
+                    labels.append(weighted.term.label)
+                consequents.append((var.label, labels.index(weighted.term.label), weighted.weight))
+            self.rules.append((antecedent, consequents))
+
+        output_type = _AnalyticOutput if analytic else _OutputBuffers
+        self.outputs = {label: output_type(var, fired[label]) for label, var in outputs.items()}
+
+    def _compile_antecedent(self, node):
+        if isinstance(node, TermAggregate):
+            if node.kind == 'not':
+                return 'not', self._compile_antecedent(node.term1)
+            return node.kind, self._compile_antecedent(node.term1), self._compile_antecedent(node.term2)
+
+        var = node.parent
+        if var.label not in self.inputs:
+            universe = var.universe
+            labels = list(var.terms)
+            mfs = np.array([var.terms[label].mf for label in labels])
+            slopes = np.diff(mfs, axis=1) / np.diff(universe)
+            self.inputs[var.label] = (universe.tolist(), labels, mfs.tolist(), slopes.tolist())
+        labels = self.inputs[var.label][1]
+        return 'term', var.label, labels.index(node.label)
+
+    @staticmethod
+    def _fuzzify(x, universe, mfs, slopes):
+        # Inputs are clipped to the universe, memberships interpolated as np.interp does
+        if x >= universe[-1]:
+            return [mf[-1] for mf in mfs]
+        if x <= universe[0]:
+            return [mf[0] for mf in mfs]
+        j = bisect_right(universe, x) - 1
+        offset = x - universe[j]
+        return [slope[j] * offset + mf[j] for mf, slope in zip(mfs, slopes)]
+
+    def _evaluate(self, node, memberships):
+        kind = node[0]
+        if kind == 'term':
+            return memberships[node[1]][node[2]]
+        if kind == 'not':
+            return 1.0 - self._evaluate(node[1], memberships)
+        first = self._evaluate(node[1], memberships)
+        second = self._evaluate(node[2], memberships)
+        return min(first, second) if kind == 'and' else max(first, second)
+
+    def compute(self, **inputs):
+        if not self.rules or set(inputs) != set(self.inputs):
+            return None
+
+        memberships = {}
+        for label, (universe, _, mfs, slopes) in self.inputs.items():
+            memberships[label] = self._fuzzify(float(inputs[label]), universe, mfs, slopes)
+
+        for buffers in self.outputs.values():
+            buffers.cuts.fill(-1.0)
+        for antecedent, consequents in self.rules:
+            strength = self._evaluate(antecedent, memberships)
+            for output, term, weight in consequents:
+                cuts = self.outputs[output].cuts
+                cuts[term] = max(cuts[term], strength * weight)
+
+        results = {}
+        for label, buffers in self.outputs.items():
+            value = buffers.defuzzify()
+            if value is None:
+                return None
+            results[label] = value
+        return results
+
+
+def compare_with_skfuzzy(control_system, samples, analytic=False):
+    """Largest absolute difference per output between this engine and skfuzzy.
+
+    ``samples`` is an iterable of input dicts (the golden set). Inputs for
+    which either implementation has no result must agree on that too. With
+    ``analytic=True`` this measures how far the closed-form centroids are
+    from skfuzzy's sampled ones.
+    """
+    from skfuzzy import control as ctrl
+
+    native = ControlSystemSimulation(control_system, analytic)
+    reference_system = control_system.to_skfuzzy()
+    errors = {}
+    for inputs in samples:
+        # A fresh simulation per sample: when no rule fires skfuzzy leaves the
+        # previous outputs in place instead of raising
+        reference = ctrl.ControlSystemSimulation(reference_system)
+        expected = None
+        try:
+            for label, value in inputs.items():
+                reference.input[label] = value
+            reference.compute()
+            if reference.output:
+                expected = {label: reference.output[label] for label in native.outputs}
+        except (ValueError, KeyError, AssertionError):
+            pass
+        actual = native.compute(**inputs)
+        if (expected is None) != (actual is None):
+            raise AssertionError("Engines disagree on whether {} has an output".format(inputs))
+        for label in actual or ():
+            errors[label] = max(errors.get(label, 0.0), abs(actual[label] - expected[label]))
+    return errors
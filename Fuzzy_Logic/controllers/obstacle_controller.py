@@ -1,105 +1,159 @@
 # obstacle_controller.py
 import numpy as np
-import skfuzzy as fuzz
-from skfuzzy import control as ctrl
+
+from . import mamdani
+from .inference import build_engines
+from .lookup import LookupTable
+
+# Черновые правила объезда (закомментированы в _define_rules) в виде таблицы для rule_table:
+# ((расстояние, угол или None), (направление, скорость))
+OBSTACLE_RULES = [
+    (('extremely_close', 'center'), ('sharp_left', 'stop')),
+    (('extremely_close', 'slightly_left'), ('sharp_right', 'stop')),
+    (('extremely_close', 'slightly_right'), ('sharp_left', 'stop')),
+    (('very_close', 'center'), ('left', 'very_slow')),
+    (('very_close', 'slightly_left'), ('right', 'very_slow')),
+    (('very_close', 'slightly_right'), ('left', 'very_slow')),
+    (('close', 'center'), ('slight_left', 'slow')),
+    (('close', 'left'), ('slight_right', 'slow')),
+    (('close', 'right'), ('slight_left', 'slow')),
+    (('medium', 'center'), ('slight_left', 'medium')),
+    (('medium', 'slightly_left'), ('slight_right', 'medium')),
+    (('medium', 'slightly_right'), ('slight_left', 'medium')),
+    (('far', None), ('center', 'fast')),
+    (('very_far', None), ('center', 'fast')),
+]
+
 
 class ObstacleController:
-    def __init__(self):
+    def __init__(self, compiled=False, angle_step=5, distance_step=0.02, max_error=(0.01, 1.0),
+                 analytic=False, memberships=None, rule_table=None):
         # Input variables
-        self.angle_to_obstacle = ctrl.Antecedent(np.arange(-90, 91, 1), 'angle_to_obstacle')
-        self.distance_to_obstacle = ctrl.Antecedent(np.arange(0, 0.4, 0.01), 'distance_to_obstacle')
+        self.angle_to_obstacle = mamdani.Antecedent(np.arange(-90, 91, 1), 'angle_to_obstacle')
+        self.distance_to_obstacle = mamdani.Antecedent(np.arange(0, 0.4, 0.01), 'distance_to_obstacle')
 
         # Output variables
-        self.robot_speed = ctrl.Consequent(np.arange(0, 0.2, 0.01), 'robot_speed')
-        self.robot_direction = ctrl.Consequent(np.arange(-90, 91, 1), 'robot_direction')
+        self.robot_speed = mamdani.Consequent(np.arange(0, 0.2, 0.01), 'robot_speed')
+        self.robot_direction = mamdani.Consequent(np.arange(-90, 91, 1), 'robot_direction')
 
         self._define_memberships()
-        self._define_rules()
+        mamdani.apply_memberships(self, memberships)
+        self._define_rules(rule_table)
+
+        self.controller, self.simulation, self.rule_base = build_engines(self.rules, analytic)
 
-        self.controller = ctrl.ControlSystem(self.rules)
-        self.simulation = ctrl.ControlSystemSimulation(self.controller)
+        # Скомпилированный режим: выходы заранее посчитаны на сетке угол x расстояние
+        # (угол в пределах get_obstacle_info, расстояние - до порога срабатывания 0.4)
+        self.table = None
+        if compiled:
+            angles = np.linspace(-95, 95, int(round(190 / angle_step)) + 1)
+            distances = np.linspace(0, 0.4, int(round(0.4 / distance_step)) + 1)
+            self.table = LookupTable(self._compute_fuzzy, [angles, distances], max_error)
 
     def _define_memberships(self):
         # Более детальные функции принадлежности для угла до препятствия
-        self.angle_to_obstacle['very_left'] = fuzz.trapmf(self.angle_to_obstacle.universe, [-90, -90, -75, -60])
-        self.angle_to_obstacle['left'] = fuzz.trimf(self.angle_to_obstacle.universe, [-75, -45, -15])
-        self.angle_to_obstacle['slightly_left'] = fuzz.trimf(self.angle_to_obstacle.universe, [-30, -15, 0])
-        self.angle_to_obstacle['center'] = fuzz.trimf(self.angle_to_obstacle.universe, [-15, 0, 15])
-        self.angle_to_obstacle['slightly_right'] = fuzz.trimf(self.angle_to_obstacle.universe, [0, 15, 30])
-        self.angle_to_obstacle['right'] = fuzz.trimf(self.angle_to_obstacle.universe, [15, 45, 75])
-        self.angle_to_obstacle['very_right'] = fuzz.trapmf(self.angle_to_obstacle.universe, [60, 75, 90, 90])
+        self.angle_to_obstacle['very_left'] = mamdani.trapmf(self.angle_to_obstacle.universe, [-90, -90, -75, -60])
+        self.angle_to_obstacle['left'] = mamdani.trimf(self.angle_to_obstacle.universe, [-75, -45, -15])
+        self.angle_to_obstacle['slightly_left'] = mamdani.trimf(self.angle_to_obstacle.universe, [-30, -15, 0])
+        self.angle_to_obstacle['center'] = mamdani.trimf(self.angle_to_obstacle.universe, [-15, 0, 15])
+        self.angle_to_obstacle['slightly_right'] = mamdani.trimf(self.angle_to_obstacle.universe, [0, 15, 30])
+        self.angle_to_obstacle['right'] = mamdani.trimf(self.angle_to_obstacle.universe, [15, 45, 75])
+        self.angle_to_obstacle['very_right'] = mamdani.trapmf(self.angle_to_obstacle.universe, [60, 75, 90, 90])
 
         # Более детальные функции принадлежности для расстояния
-        self.distance_to_obstacle['extremely_close'] = fuzz.trimf(self.distance_to_obstacle.universe, [0, 0, 0.15])
-        self.distance_to_obstacle['very_close'] = fuzz.trimf(self.distance_to_obstacle.universe, [0.10, 0.20, 0.30])
-        self.distance_to_obstacle['close'] = fuzz.trimf(self.distance_to_obstacle.universe, [0.25, 0.35, 0.45])
-        self.distance_to_obstacle['medium'] = fuzz.trimf(self.distance_to_obstacle.universe, [0.40, 0.50, 0.60])
-        self.distance_to_obstacle['far'] = fuzz.trimf(self.distance_to_obstacle.universe, [0.55, 0.65, 75])
-        self.distance_to_obstacle['very_far'] = fuzz.trimf(self.distance_to_obstacle.universe, [70, 80, 80])
+        self.distance_to_obstacle['extremely_close'] = mamdani.trimf(self.distance_to_obstacle.universe, [0, 0, 0.15])
+        self.distance_to_obstacle['very_close'] = mamdani.trimf(self.distance_to_obstacle.universe, [0.10, 0.20, 0.30])
+        self.distance_to_obstacle['close'] = mamdani.trimf(self.distance_to_obstacle.universe, [0.25, 0.35, 0.45])
+        self.distance_to_obstacle['medium'] = mamdani.trimf(self.distance_to_obstacle.universe, [0.40, 0.50, 0.60])
+        self.distance_to_obstacle['far'] = mamdani.trimf(self.distance_to_obstacle.universe, [0.55, 0.65, 0.75])
+        self.distance_to_obstacle['very_far'] = mamdani.trimf(self.distance_to_obstacle.universe, [0.70, 0.80, 0.80])
 
         # Более детальное управление скоростью
-        self.robot_speed['stop'] = fuzz.trimf(self.robot_speed.universe, [0, 0, 0.05])
-        self.robot_speed['very_slow'] = fuzz.trimf(self.robot_speed.universe, [0, 0.05, 0.10])
-        self.robot_speed['slow'] = fuzz.trimf(self.robot_speed.universe, [0.05, 0.10, 0.15])
-        self.robot_speed['medium'] = fuzz.trimf(self.robot_speed.universe, [0.10, 0.15, 0.20])
-        self.robot_speed['fast'] = fuzz.trimf(self.robot_speed.universe, [0.15, 0.25, 0.30])
+        self.robot_speed['stop'] = mamdani.trimf(self.robot_speed.universe, [0, 0, 0.05])
+        self.robot_speed['very_slow'] = mamdani.trimf(self.robot_speed.universe, [0, 0.05, 0.10])
+        self.robot_speed['slow'] = mamdani.trimf(self.robot_speed.universe, [0.05, 0.10, 0.15])
+        self.robot_speed['medium'] = mamdani.trimf(self.robot_speed.universe, [0.10, 0.15, 0.20])
+        self.robot_speed['fast'] = mamdani.trimf(self.robot_speed.universe, [0.15, 0.25, 0.30])
 
         # Более детальное управление поворотами
-        self.robot_direction['sharp_left'] = fuzz.trapmf(self.robot_direction.universe, [-90, -90, -75, -60])
-        self.robot_direction['left'] = fuzz.trimf(self.robot_direction.universe, [-75, -45, -15])
-        self.robot_direction['slight_left'] = fuzz.trimf(self.robot_direction.universe, [-30, -15, 0])
-        self.robot_direction['center'] = fuzz.trimf(self.robot_direction.universe, [-15, 0, 15])
-        self.robot_direction['slight_right'] = fuzz.trimf(self.robot_direction.universe, [0, 15, 30])
-        self.robot_direction['right'] = fuzz.trimf(self.robot_direction.universe, [15, 45, 75])
-        self.robot_direction['sharp_right'] = fuzz.trapmf(self.robot_direction.universe, [60, 75, 90, 90])
-
-    def _define_rules(self):
+        self.robot_direction['sharp_left'] = mamdani.trapmf(self.robot_direction.universe, [-90, -90, -75, -60])
+        self.robot_direction['left'] = mamdani.trimf(self.robot_direction.universe, [-75, -45, -15])
+        self.robot_direction['slight_left'] = mamdani.trimf(self.robot_direction.universe, [-30, -15, 0])
+        self.robot_direction['center'] = mamdani.trimf(self.robot_direction.universe, [-15, 0, 15])
+        self.robot_direction['slight_right'] = mamdani.trimf(self.robot_direction.universe, [0, 15, 30])
+        self.robot_direction['right'] = mamdani.trimf(self.robot_direction.universe, [15, 45, 75])
+        self.robot_direction['sharp_right'] = mamdani.trapmf(self.robot_direction.universe, [60, 75, 90, 90])
+
+    def _define_rules(self, rule_table=None):
+        # Таблица правил: [((расстояние, угол или None), (направление, скорость)), ...]
+        if rule_table is not None:
+            self.rules = []
+            for (distance, angle), (direction, speed) in rule_table:
+                antecedent = self.distance_to_obstacle[distance]
+                if angle is not None:
+                    antecedent = antecedent & self.angle_to_obstacle[angle]
+                self.rules.append(mamdani.Rule(antecedent, [self.robot_direction[direction], self.robot_speed[speed]]))
+            return
+
         self.rules = [
             # # Правила для экстремально близких препятствий - экстренное уклонение
-            # ctrl.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['center'],
-            #          [self.robot_direction['sharp_left'], self.robot_speed['stop']]),
-            # ctrl.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['slightly_left'],
-            #          [self.robot_direction['sharp_right'], self.robot_speed['stop']]),
-            # ctrl.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['slightly_right'],
-            #          [self.robot_direction['sharp_left'], self.robot_speed['stop']]),
+            # mamdani.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['center'],
+            #             [self.robot_direction['sharp_left'], self.robot_speed['stop']]),
+            # mamdani.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['slightly_left'],
+            #             [self.robot_direction['sharp_right'], self.robot_speed['stop']]),
+            # mamdani.Rule(self.distance_to_obstacle['extremely_close'] & self.angle_to_obstacle['slightly_right'],
+            #             [self.robot_direction['sharp_left'], self.robot_speed['stop']]),
             #
             # # Правила для очень близких препятствий - сильное уклонение
-            # ctrl.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['center'],
-            #          [self.robot_direction['left'], self.robot_speed['very_slow']]),
-            # ctrl.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['slightly_left'],
-            #          [self.robot_direction['right'], self.robot_speed['very_slow']]),
-            # ctrl.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['slightly_right'],
-            #          [self.robot_direction['left'], self.robot_speed['very_slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['center'],
+            #             [self.robot_direction['left'], self.robot_speed['very_slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['slightly_left'],
+            #             [self.robot_direction['right'], self.robot_speed['very_slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['very_close'] & self.angle_to_obstacle['slightly_right'],
+            #             [self.robot_direction['left'], self.robot_speed['very_slow']]),
             #
             # # Правила для близких препятствий - умеренное уклонение
-            # ctrl.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['center'],
-            #          [self.robot_direction['slight_left'], self.robot_speed['slow']]),
-            # ctrl.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['left'],
-            #          [self.robot_direction['slight_right'], self.robot_speed['slow']]),
-            # ctrl.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['right'],
-            #          [self.robot_direction['slight_left'], self.robot_speed['slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['center'],
+            #             [self.robot_direction['slight_left'], self.robot_speed['slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['left'],
+            #             [self.robot_direction['slight_right'], self.robot_speed['slow']]),
+            # mamdani.Rule(self.distance_to_obstacle['close'] & self.angle_to_obstacle['right'],
+            #             [self.robot_direction['slight_left'], self.robot_speed['slow']]),
             #
             # # Правила для препятствий на среднем расстоянии - легкое уклонение
-            # ctrl.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['center'],
-            #          [self.robot_direction['slight_left'], self.robot_speed['medium']]),
-            # ctrl.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['slightly_left'],
-            #          [self.robot_direction['slight_right'], self.robot_speed['medium']]),
-            # ctrl.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['slightly_right'],
-            #          [self.robot_direction['slight_left'], self.robot_speed['medium']]),
+            # mamdani.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['center'],
+            #             [self.robot_direction['slight_left'], self.robot_speed['medium']]),
+            # mamdani.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['slightly_left'],
+            #             [self.robot_direction['slight_right'], self.robot_speed['medium']]),
+            # mamdani.Rule(self.distance_to_obstacle['medium'] & self.angle_to_obstacle['slightly_right'],
+            #             [self.robot_direction['slight_left'], self.robot_speed['medium']]),
             #
             # # Правила для дальних препятствий - нормальное движение
-            # ctrl.Rule(self.distance_to_obstacle['far'],
-            #          [self.robot_direction['center'], self.robot_speed['fast']]),
-            # ctrl.Rule(self.distance_to_obstacle['very_far'],
-            #          [self.robot_direction['center'], self.robot_speed['fast']])
+            # mamdani.Rule(self.distance_to_obstacle['far'],
+            #             [self.robot_direction['center'], self.robot_speed['fast']]),
+            # mamdani.Rule(self.distance_to_obstacle['very_far'],
+            #             [self.robot_direction['center'], self.robot_speed['fast']])
         ]
 
     def compute(self, angle, distance):
-        try:
-            self.simulation.input['angle_to_obstacle'] = angle
-            self.simulation.input['distance_to_obstacle'] = distance * 100
-            self.simulation.compute()
-            return (self.simulation.output['robot_speed'],
-                   self.simulation.output['robot_direction'])
-        except:
+        if self.table is not None:
+            return self.table(angle, distance)
+        return self._compute_fuzzy(angle, distance)
+
+    def _compute_fuzzy(self, angle, distance):
+        outputs = self.simulation.compute(angle_to_obstacle=angle, distance_to_obstacle=distance)
+        if outputs is None:
             return 5, -angle
+        return outputs['robot_speed'], outputs['robot_direction']
+
+    def compute_batch(self, angles, distances):
+        """Vectorized ``compute`` over arrays of angles and distances."""
+        angles, distances = np.broadcast_arrays(np.asarray(angles, dtype=float),
+                                                np.asarray(distances, dtype=float))
+        if self.table is not None:
+            return self.table.lookup_batch(angles, distances)
+        outputs, valid = self.rule_base.compute_batch(angle_to_obstacle=angles,
+                                                      distance_to_obstacle=distances)
+        speed = np.where(valid, outputs.get('robot_speed', np.nan), 5)
+        direction = np.where(valid, outputs.get('robot_direction', np.nan), -angles)
+        return speed, direction
@@ -0,0 +1 @@
+# server/__init__.py
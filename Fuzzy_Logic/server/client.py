@@ -0,0 +1,184 @@
+# client.py
+"""Stand-in robots for the control server.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m server.client --udp 127.0.0.1:9700 --robots 64 --requests 500
+    python -m server.client --local --robots 64 --check   # server in-process
+
+Every robot is a closed loop: it sends a telemetry request, waits for the
+reply, and sends the next one. Round-trip latencies are reported as
+percentiles; with ``--check`` every reply is compared with the local
+controllers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+import numpy as np
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from utils.utils import compute_fuzzy_control_batch
+from .control_server import (ControlServer, REQUEST, bind_socket, decode_response, encode_request,
+                             parse_address, serve)
+
+
+class _Robot(asyncio.DatagramProtocol):
+
+    def __init__(self):
+        self.waiting = {}  # request id -> future
+
+    def datagram_received(self, data, addr):
+        request_id, speed, direction = decode_response(data)
+        future = self.waiting.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result((speed, direction))
+
+
+class StandInClient:
+    """``n_robots`` concurrent stand-in robots sending random telemetry to a server address.
+
+    Poses are uniform over the field; with probability ``obstacle_rate`` an
+    obstacle is reported within the 0.4 m detection range.
+    """
+
+    def __init__(self, address, n_robots=16, seed=0, timeout=1.0, obstacle_rate=0.5):
+        self.address = address
+        self.n_robots = n_robots
+        self.rng = np.random.default_rng(seed)
+        self.timeout = timeout
+        self.obstacle_rate = obstacle_rate
+        self.latencies = []
+        self.timeouts = 0
+        self.telemetry = []  # (request record, (speed, direction)) of every answered request
+
+    def _socket(self, directory, robot_id):
+        if isinstance(self.address, str):
+            # Unix datagram clients need a bound path of their own to receive replies
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(os.path.join(directory, 'robot-{}'.format(robot_id)))
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+        return sock
+
+    def _telemetry(self):
+        robot = self.rng.uniform(0.25, 1.75, 2)
+        target = (self.rng.uniform(0.5, 1.5), self.rng.uniform(1.7, 1.9))
+        if self.rng.random() < self.obstacle_rate:
+            obstacle = (self.rng.uniform(-90.0, 90.0), self.rng.uniform(0.0, 0.4))
+        else:
+            obstacle = (0.0, float('inf'))
+        return robot, target, obstacle
+
+    async def _run_robot(self, robot_id, n_requests, directory):
+        loop = asyncio.get_running_loop()
+        transport, protocol = await loop.create_datagram_endpoint(_Robot, sock=self._socket(directory, robot_id))
+        try:
+            for i in range(n_requests):
+                request_id = robot_id * n_requests + i
+                data = encode_request(request_id, *self._telemetry())
+                future = loop.create_future()
+                protocol.waiting[request_id] = future
+                sent = time.perf_counter()
+                transport.sendto(data, self.address)
+                try:
+                    reply = await asyncio.wait_for(future, self.timeout)
+                except asyncio.TimeoutError:
+                    protocol.waiting.pop(request_id, None)
+                    self.timeouts += 1
+                    continue
+                self.latencies.append(time.perf_counter() - sent)
+                self.telemetry.append((data, reply))
+        finally:
+            transport.close()
+
+    async def run(self, n_requests):
+        """Send ``n_requests`` from every robot; return the round-trip summary."""
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.perf_counter()
+            await asyncio.gather(*(self._run_robot(robot_id, n_requests, directory)
+                                   for robot_id in range(self.n_robots)))
+            elapsed = time.perf_counter() - started
+        return self.summary(elapsed)
+
+    def summary(self, elapsed=None):
+        rtt = np.asarray(self.latencies) * 1e6
+        p50, p99 = np.percentile(rtt, [50, 99]) if len(rtt) else (None, None)
+        return {
+            'robots': self.n_robots,
+            'replies': len(self.latencies),
+            'timeouts': self.timeouts,
+            'rtt_p50_us': None if p50 is None else float(p50),
+            'rtt_p99_us': None if p99 is None else float(p99),
+            'requests_per_s': len(self.latencies) / elapsed if elapsed else None,
+        }
+
+    def check(self, goal_controller, obstacle_controller, arbiter=None, tolerance=1e-9):
+        """Number of replies that differ from the local controllers by more than ``tolerance``."""
+        if not self.telemetry:
+            return 0
+        requests = np.frombuffer(b''.join(data for data, _ in self.telemetry), dtype=REQUEST)
+        speed, direction = compute_fuzzy_control_batch(
+            requests['robot'], requests['target'], [], goal_controller, obstacle_controller,
+            (requests['obstacle_angle'], requests['obstacle_distance']), arbiter)
+        replies = np.array([reply for _, reply in self.telemetry])
+        return int(np.sum((np.abs(replies[:, 0] - speed) > tolerance) |
+                          (np.abs(replies[:, 1] - direction) > tolerance)))
+
+
+async def _run_local(client, n_requests, server):
+    # Server and stand-in robots on the same event loop
+    unix = isinstance(client.address, str)
+    sock = bind_socket(None if unix else client.address, client.address if unix else None)
+    client.address = sock.getsockname()
+    serving = asyncio.ensure_future(serve(server, sock))
+    try:
+        return await client.run(n_requests)
+    finally:
+        serving.cancel()
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        if unix:
+            os.unlink(client.address)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in robots for the fuzzy control server")
+    parser.add_argument('--udp', default='127.0.0.1:9700', help="server HOST:PORT")
+    parser.add_argument('--unix', help="server Unix datagram socket path instead")
+    parser.add_argument('--robots', type=int, default=16, help="concurrent stand-in robots")
+    parser.add_argument('--requests', type=int, default=200, help="requests per robot")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--local', action='store_true', help="run the server in this process")
+    parser.add_argument('--compiled', action='store_true',
+                        help="controllers of --local and --check use lookup tables")
+    parser.add_argument('--check', action='store_true', help="compare replies with the local controllers")
+    args = parser.parse_args(argv)
+
+    address = args.unix or parse_address(args.udp)
+    if args.local and not args.unix:
+        address = (address[0], 0)  # any free port
+    client = StandInClient(address, args.robots, args.seed)
+    goal_controller = GoalController(compiled=args.compiled)
+    obstacle_controller = ObstacleController(compiled=args.compiled)
+
+    if args.local:
+        server = ControlServer(goal_controller, obstacle_controller)
+        summary = asyncio.run(_run_local(client, args.requests, server))
+        summary['server'] = server.stats()
+    else:
+        summary = asyncio.run(client.run(args.requests))
+    if args.check:
+        summary['mismatches'] = client.check(goal_controller, obstacle_controller)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
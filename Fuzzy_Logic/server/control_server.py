@@ -0,0 +1,237 @@
+# control_server.py
+"""Local control service: the fuzzy controllers behind a datagram socket.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m server.control_server --udp 127.0.0.1:9700 --compiled
+    python -m server.control_server --unix /tmp/fuzzy_control.sock
+
+A request is one datagram holding a REQUEST record (little-endian, 52 bytes):
+
+    id (uint32) | robot x, y | target x, y | obstacle angle, distance (float64)
+
+with the obstacle distance ``inf`` when nothing is sensed. The reply is one
+RESPONSE record: id | speed | direction. All datagrams waiting on the socket
+when the server wakes up are decided together by one
+compute_fuzzy_control_batch call, so concurrent clients share inference.
+Datagrams of the wrong size and requests holding any other non-finite value
+are dropped without a reply.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import time
+import numpy as np
+from controllers.arbitration import BlendedArbiter
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from utils.utils import compute_fuzzy_control_batch
+
+REQUEST = np.dtype([('id', '<u4'), ('robot', '<f8', (2,)), ('target', '<f8', (2,)),
+                    ('obstacle_angle', '<f8'), ('obstacle_distance', '<f8')])
+RESPONSE = np.dtype([('id', '<u4'), ('speed', '<f8'), ('direction', '<f8')])
+
+
+def encode_request(request_id, robot_pos, target_pos, obstacle_info=(0.0, float('inf'))):
+    request = np.zeros(1, dtype=REQUEST)
+    request['id'] = request_id
+    request['robot'] = robot_pos
+    request['target'] = target_pos
+    request['obstacle_angle'], request['obstacle_distance'] = obstacle_info
+    return request.tobytes()
+
+
+def finite_requests(requests):
+    """Mask of the REQUEST records whose values are all finite (the obstacle distance may be ``inf``)."""
+    distance = requests['obstacle_distance']
+    return (np.isfinite(requests['robot']).all(axis=1) & np.isfinite(requests['target']).all(axis=1) &
+            np.isfinite(requests['obstacle_angle']) & (np.isfinite(distance) | (distance == np.inf)))
+
+
+def decode_response(data):
+    """(id, speed, direction) of a reply datagram."""
+    reply = np.frombuffer(data, dtype=RESPONSE)[0]
+    return int(reply['id']), float(reply['speed']), float(reply['direction'])
+
+
+def bind_socket(udp=None, unix=None):
+    """Non-blocking datagram socket bound to ``udp`` ((host, port)) or the ``unix`` socket path."""
+    if unix:
+        if os.path.exists(unix):
+            os.unlink(unix)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(unix)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(udp)
+    sock.setblocking(False)
+    return sock
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class ControlServer(asyncio.DatagramProtocol):
+    """Answers control requests in micro-batches.
+
+    On every wake-up the socket is drained (up to ``max_batch`` datagrams)
+    and the requests are decided in one batched inference call; with
+    ``max_delay`` (seconds) the server also waits that long for more requests
+    before deciding. Server-side latencies, from reading a request to sending
+    its reply, are kept for the last ``window`` requests.
+
+    ``sock`` is the raw socket under the transport; ``serve`` sets it.
+    """
+
+    def __init__(self, goal_controller=None, obstacle_controller=None, arbiter=None, max_batch=256,
+                 max_delay=0.0, window=100000):
+        self.goal_controller = goal_controller or GoalController()
+        self.obstacle_controller = obstacle_controller or ObstacleController()
+        self.arbiter = arbiter
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.latencies = np.zeros(window)
+        self.transport = None
+        self.sock = None
+        self.pending = []  # (datagram, address, time read)
+        self._flush_handle = None
+        self.reset_stats()
+
+        # Warm up both controllers (and their lookup tables) before the first request
+        self._decide(np.frombuffer(encode_request(0, (1.0, 0.5), (1.0, 1.8)) +
+                                   encode_request(0, (1.0, 0.5), (1.0, 1.8), (10.0, 0.2)), dtype=REQUEST))
+
+    def reset_stats(self):
+        self.requests = 0
+        self.batches = 0
+        self.dropped = 0
+        self.max_batch_seen = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self._queue(data, addr)
+        # Everything else already waiting in the socket buffer joins the batch
+        while self.sock is not None and len(self.pending) < self.max_batch:
+            try:
+                data, addr = self.sock.recvfrom(4096)
+            except (BlockingIOError, InterruptedError):
+                break
+            self._queue(data, addr)
+
+        if len(self.pending) >= self.max_batch or not self.max_delay:
+            self.flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.max_delay, self.flush)
+
+    def _queue(self, data, addr):
+        if len(data) != REQUEST.itemsize:
+            self.dropped += 1
+            return
+        self.pending.append((data, addr, time.perf_counter()))
+
+    def _decide(self, requests):
+        return compute_fuzzy_control_batch(
+            requests['robot'], requests['target'], [], self.goal_controller, self.obstacle_controller,
+            (requests['obstacle_angle'], requests['obstacle_distance']), self.arbiter)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self.pending = self.pending, []
+        if not pending:
+            return
+
+        requests = np.frombuffer(b''.join(data for data, _, _ in pending), dtype=REQUEST)
+        finite = finite_requests(requests)
+        if not finite.all():
+            # One NaN would poison the whole batch's inference; drop it before deciding
+            self.dropped += int(np.count_nonzero(~finite))
+            pending = [request for request, keep in zip(pending, finite) if keep]
+            requests = requests[finite]
+            if not pending:
+                return
+        replies = np.empty(len(requests), dtype=RESPONSE)
+        replies['id'] = requests['id']
+        replies['speed'], replies['direction'] = self._decide(requests)
+        payload = replies.tobytes()
+        size = RESPONSE.itemsize
+        for i, (_, addr, _) in enumerate(pending):
+            self.transport.sendto(payload[i * size:(i + 1) * size], addr)
+
+        now = time.perf_counter()
+        window = len(self.latencies)
+        for i, (_, _, received) in enumerate(pending):
+            self.latencies[(self.requests + i) % window] = now - received
+        self.requests += len(pending)
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(pending))
+
+    def stats(self):
+        """Request counts, batch sizes and p50/p99 server-side latency in microseconds."""
+        latencies = self.latencies[:min(self.requests, len(self.latencies))] * 1e6
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (None, None)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch': self.requests / self.batches if self.batches else None,
+            'max_batch': self.max_batch_seen,
+            'dropped': self.dropped,
+            'p50_us': None if p50 is None else float(p50),
+            'p99_us': None if p99 is None else float(p99),
+        }
+
+
+async def serve(server, sock, duration=None, report_every=None):
+    """Run ``server`` on ``sock`` for ``duration`` seconds (or until cancelled)."""
+    # The protocol drains this socket itself between the transport's reads
+    server.sock = sock
+    transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(lambda: server, sock=sock)
+    started = time.perf_counter()
+    try:
+        while duration is None or time.perf_counter() - started < duration:
+            interval = report_every or 3600.0
+            if duration is not None:
+                interval = min(interval, duration - (time.perf_counter() - started))
+            await asyncio.sleep(max(interval, 0.0))
+            if report_every:
+                print(server.stats(), flush=True)
+    finally:
+        transport.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the fuzzy controllers over a local datagram socket")
+    parser.add_argument('--udp', default='127.0.0.1:9700', help="HOST:PORT to listen on")
+    parser.add_argument('--unix', help="listen on this Unix datagram socket path instead")
+    parser.add_argument('--compiled', action='store_true', help="use lookup-table controllers")
+    parser.add_argument('--blend', action='store_true', help="blend the controllers instead of switching")
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-delay', type=float, default=0.0, help="seconds to wait for more requests")
+    parser.add_argument('--report-every', type=float, default=5.0, help="seconds between stats lines")
+    parser.add_argument('--duration', type=float, default=None, help="stop after this many seconds")
+    args = parser.parse_args(argv)
+
+    goal_controller = GoalController(compiled=args.compiled)
+    obstacle_controller = ObstacleController(compiled=args.compiled)
+    arbiter = BlendedArbiter(goal_controller, obstacle_controller) if args.blend else None
+    server = ControlServer(goal_controller, obstacle_controller, arbiter, args.max_batch, args.max_delay)
+    sock = bind_socket(None if args.unix else parse_address(args.udp), args.unix)
+    print("listening on", sock.getsockname(), flush=True)
+    try:
+        asyncio.run(serve(server, sock, args.duration, args.report_every))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+    print(server.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+# simulation/__init__.py
+from .engine import SimulationEngine
+from .engine import RUNNING, COLLISION, GOAL, TIMEOUT
+from .world import BatchWorld
+from .spatial import ObstacleGrid
+from .sensors import RangeSensorRing
+from .recorder import TrajectoryRecorder, TrajectoryLog
+from .profiling import StepProfiler
+from .collision import time_of_impact, time_of_impact_batch
+from .scenarios import Scenario, ScenarioStream
+from .results import ResultSink, ResultTable
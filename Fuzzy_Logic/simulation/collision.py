@@ -0,0 +1,115 @@
+# collision.py
+"""Continuous (swept) collision tests between the robot circle and obstacle bars.
+
+Over one step the robot's center and each bar move along straight lines. In
+the bar's frame the circle then hits the bar exactly when its center enters
+the bar grown by the radius: a rounded rectangle, i.e. two crossed boxes and
+four corner discs. The time of impact is the earliest entry time over those
+parts, as a fraction of the step (0 = start, 1 = end), so a bar can not be
+tunnelled through however large the step.
+"""
+import math
+import numpy as np
+
+
+def _segment_box(ox, oy, dx, dy, left, bottom, right, top):
+    # Slab test: entry time of o + t*d, t in [0, 1], into the box
+    t0, t1 = 0.0, 1.0
+    for o, d, low, high in ((ox, dx, left, right), (oy, dy, bottom, top)):
+        if d == 0.0:
+            if o < low or o > high:
+                return None
+        else:
+            ta, tb = (low - o) / d, (high - o) / d
+            if ta > tb:
+                ta, tb = tb, ta
+            t0 = max(t0, ta)
+            t1 = min(t1, tb)
+            if t0 > t1:
+                return None
+    return t0
+
+
+def _segment_disc(ox, oy, dx, dy, cx, cy, radius):
+    # Smallest t in [0, 1] with |o + t*d - c| = radius
+    fx, fy = ox - cx, oy - cy
+    c = fx * fx + fy * fy - radius * radius
+    if c <= 0.0:
+        return 0.0
+    a = dx * dx + dy * dy
+    b = fx * dx + fy * dy
+    if a == 0.0 or b >= 0.0:
+        return None  # not moving towards the disc
+    discriminant = b * b - a * c
+    if discriminant < 0.0:
+        return None
+    t = (-b - math.sqrt(discriminant)) / a
+    return t if t <= 1.0 else None
+
+
+def time_of_impact(start, displacement, radius, rect, rect_displacement=(0.0, 0.0)):
+    """First time in [0, 1] at which a moving circle touches a moving rectangle, or None.
+
+    ``start`` and ``displacement`` describe the circle's center over the step,
+    ``rect`` is (left, bottom, right, top) at the start of the step and moves
+    by ``rect_displacement``.
+    """
+    left, bottom, right, top = rect
+    ox, oy = start
+    dx = displacement[0] - rect_displacement[0]
+    dy = displacement[1] - rect_displacement[1]
+
+    hits = [_segment_box(ox, oy, dx, dy, left - radius, bottom, right + radius, top),
+            _segment_box(ox, oy, dx, dy, left, bottom - radius, right, top + radius)]
+    for cx in (left, right):
+        for cy in (bottom, top):
+            hits.append(_segment_disc(ox, oy, dx, dy, cx, cy, radius))
+    hits = [t for t in hits if t is not None]
+    return min(hits) if hits else None
+
+
+def time_of_impact_batch(start, displacement, radius, rects, rect_displacement):
+    """Vectorized time_of_impact of N circles against K rectangles each.
+
+    ``start`` and ``displacement`` have shape (N, 2), ``rects`` (N, K, 4) and
+    ``rect_displacement`` (N, K, 2). Returns the earliest time of impact per
+    circle over its rectangles, shape (N,), ``inf`` where nothing is hit.
+    """
+    ox = np.asarray(start, dtype=float)[:, None, 0]
+    oy = np.asarray(start, dtype=float)[:, None, 1]
+    rects = np.asarray(rects, dtype=float)
+    rect_displacement = np.asarray(rect_displacement, dtype=float)
+    dx = np.asarray(displacement, dtype=float)[:, None, 0] - rect_displacement[..., 0]
+    dy = np.asarray(displacement, dtype=float)[:, None, 1] - rect_displacement[..., 1]
+    left, bottom, right, top = (rects[..., i] for i in range(4))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        def boxes(low_x, high_x, low_y, high_y):
+            t0 = np.zeros_like(dx)
+            t1 = np.ones_like(dx)
+            for o, d, low, high in ((ox, dx, low_x, high_x), (oy, dy, low_y, high_y)):
+                ta, tb = (low - o) / d, (high - o) / d
+                # Parallel to the slab: inside for all t, or never
+                inside = (o >= low) & (o <= high)
+                ta = np.where(d == 0.0, np.where(inside, -np.inf, np.inf), ta)
+                tb = np.where(d == 0.0, np.inf, tb)
+                t0 = np.maximum(t0, np.minimum(ta, tb))
+                t1 = np.minimum(t1, np.maximum(ta, tb))
+            return np.where(t0 <= t1, t0, np.inf)
+
+        hit = np.minimum(boxes(left - radius, right + radius, bottom, top),
+                         boxes(left, right, bottom - radius, top + radius))
+
+        a = dx * dx + dy * dy
+        for cx in (left, right):
+            for cy in (bottom, top):
+                fx, fy = ox - cx, oy - cy
+                c = fx * fx + fy * fy - radius * radius
+                b = fx * dx + fy * dy
+                discriminant = b * b - a * c
+                t = (-b - np.sqrt(np.maximum(discriminant, 0.0))) / a
+                approaching = (a > 0.0) & (b < 0.0) & (discriminant >= 0.0) & (t <= 1.0)
+                t = np.where(c <= 0.0, 0.0, np.where(approaching, t, np.inf))
+                hit = np.minimum(hit, t)
+
+    return hit.min(axis=1) if hit.shape[1] else np.full(len(hit), np.inf)
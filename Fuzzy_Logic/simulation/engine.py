@@ -0,0 +1,320 @@
+# engine.py
+import math
+import random
+import numpy as np
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from utils.utils import calculate_angle_to_target, compute_fuzzy_control, get_obstacle_info
+from .collision import time_of_impact
+from .spatial import ObstacleGrid
+
+# Step outcomes
+RUNNING = 'running'
+COLLISION = 'collision'
+GOAL = 'goal'
+TIMEOUT = 'timeout'
+
+
+class SimulationEngine:
+    """Fixed-timestep robot navigation world without any display dependency.
+
+    All positions are in meters on a 2 x 2 m field with y pointing up. The
+    timestep ``dt`` is measured in frames of the interactive simulator
+    (``dt=1`` reproduces one iteration of its 80 Hz loop), so larger values
+    trade accuracy for fewer steps per episode.
+
+    Observers are callables ``observer(engine, status)`` invoked after every
+    step, e.g. the pygame view in ``simulator.py``.
+
+    With ``spatial_index=True`` obstacle sensing and collision checks go
+    through an ObstacleGrid instead of scanning every obstacle. The grid's
+    bookkeeping makes it about half as fast as the scan with the standard 4
+    bars, and it only pays off from about 16 (``benchmarks.spatial_index``),
+    so by default (None) an episode uses it when it has at least
+    ``spatial_index_threshold`` obstacles.
+
+    ``sensor`` (e.g. a RangeSensorRing) replaces the distance to obstacle
+    reference points with simulated range readings of the bar geometry; the
+    latest readings are kept in ``self.ranges``.
+
+    While observers are attached, the controller inputs and outputs of the
+    last step, and which controller produced them ('goal', 'obstacle', or
+    'blend' when an arbiter mixed both), are kept in ``self.control``; bare
+    runs skip building it.
+
+    ``profiler`` (a StepProfiler) times every stage of ``step``; leave it
+    None for uninstrumented runs.
+
+    ``arbiter`` (e.g. BlendedArbiter) blends the two controllers instead of
+    switching between them at the detection range.
+
+    With ``continuous=True`` collisions and the goal are tested along the
+    whole path of the step (see ``collision.py``) rather than at its end, so
+    large ``dt`` can not tunnel through the bars or step over the target. A
+    colliding robot is left at the point of impact, and the fraction of the
+    step at which it hit is kept in ``self.impact_time``.
+    """
+
+    robot_radius = 0.25
+    obstacle_height = 0.1
+    goal_tolerance = 0.15  # Goal reached if within 15cm
+    move_scale = 0.005  # Distance travelled per frame at unit speed
+    detection_range = 0.4  # Same 40 cm threshold as get_obstacle_info
+    spatial_index_threshold = 16  # Obstacles from which ObstacleGrid beats the full scan
+
+    def __init__(self, goal_controller=None, obstacle_controller=None, seed=None, dt=1.0, observers=(),
+                 n_obstacles=4, spatial_index=None, sensor=None, profiler=None, arbiter=None,
+                 continuous=False):
+        self.goal_controller = goal_controller or GoalController()
+        self.obstacle_controller = obstacle_controller or ObstacleController()
+        self.random = random.Random(seed)
+        self.dt = dt
+        self.observers = list(observers)
+        self.n_obstacles = n_obstacles
+        self.spatial_index = spatial_index
+        self.sensor = sensor
+        self.profiler = profiler
+        self.arbiter = arbiter
+        self.continuous = continuous
+        self.impact_time = None
+        self.ranges = None
+        self.control = None
+        self.episode = -1
+
+        self.reset_simulation()
+
+    def reset_simulation(self, seed=None):
+        """Reset the simulation with new random positions (reseeded if ``seed`` is given)"""
+        if seed is not None:
+            self.random.seed(seed)
+        self.robot_pos = [1.0, 0.05]  # Center x, bottom y + 0.05
+        self.target_pos = [self.random.uniform(0.5, 1.5), self.random.uniform(1.7, 1.9)]
+
+        # Initialize obstacles
+        self.obstacles = self._generate_obstacles()
+        self.obstacle_speeds = [self.random.uniform(0.0002, 0.0005) for _ in range(self.n_obstacles)]
+        self.obstacle_directions = [1 if self.random.random() > 0.5 else -1 for _ in range(self.n_obstacles)]
+        self._start_episode()
+
+    def load_scenario(self, scenario):
+        """Start an episode from a Scenario (see scenarios.py) instead of a random draw."""
+        self.robot_pos = list(scenario.robot_pos)
+        self.target_pos = list(scenario.target_pos)
+        self.obstacles = [list(obs) for obs in scenario.obstacles]
+        self.obstacle_speeds = list(scenario.obstacle_speeds)
+        self.obstacle_directions = list(scenario.obstacle_directions)
+        self._start_episode()
+
+    def _start_episode(self):
+        self.obstacle_index = None
+        spatial_index = self.spatial_index
+        if spatial_index is None:
+            spatial_index = len(self.obstacles) >= self.spatial_index_threshold
+        if spatial_index:
+            self.obstacle_index = ObstacleGrid(self.obstacles, obstacle_height=self.obstacle_height)
+
+        self.steps = 0
+        self.path_length = 0.0
+        self.impact_time = None
+        self.episode += 1
+
+    def _generate_obstacles(self):
+        obstacles = []
+        y_positions = np.linspace(0.7, 1.4, self.n_obstacles)
+
+        for y in y_positions:
+            width = self.random.uniform(0.3, 0.5)
+            x = self.random.uniform(0.2, 1.8 - width)
+            obstacles.append([x, float(y), width])
+
+        return obstacles
+
+    def _update_obstacles(self, dt):
+        for i in range(len(self.obstacles)):
+            # Update x position
+            self.obstacles[i][0] += self.obstacle_speeds[i] * self.obstacle_directions[i] * dt
+
+            # Reverse direction if hitting walls
+            if self.obstacles[i][0] <= 0 or self.obstacles[i][0] + self.obstacles[i][2] >= 2:
+                self.obstacle_directions[i] *= -1
+
+            if self.obstacle_index is not None:
+                self.obstacle_index.update(i)
+
+    def _move_robot(self, speed, direction, dt):
+        angle_rad = math.radians(direction)
+        if angle_rad > 0:
+            self.robot_pos[0] += speed * math.cos(angle_rad) * self.move_scale * dt
+        else:
+            self.robot_pos[0] += speed * math.cos(angle_rad) * -self.move_scale * dt
+        self.robot_pos[1] += speed * abs(math.sin(angle_rad) * self.move_scale) * dt
+
+    @staticmethod
+    def check_circle_rect_collision(circle_center, circle_radius, rect):
+        """Check if a circle and a rectangle (left, bottom, right, top) collide."""
+        left, bottom, right, top = rect
+
+        # Closest point on the rectangle to the circle's center
+        closest_x = max(left, min(circle_center[0], right))
+        closest_y = max(bottom, min(circle_center[1], top))
+
+        distance_x = circle_center[0] - closest_x
+        distance_y = circle_center[1] - closest_y
+        return distance_x ** 2 + distance_y ** 2 < circle_radius ** 2
+
+    def _check_collision(self):
+        """Check if robot has collided with any obstacle"""
+        if self.obstacle_index is not None:
+            return self.obstacle_index.circle_collides(self.robot_pos, self.robot_radius)
+
+        half_height = self.obstacle_height / 2
+        for obs_x, obs_y, obs_width in self.obstacles:
+            rect = (obs_x, obs_y - half_height, obs_x + obs_width, obs_y + half_height)
+            if self.check_circle_rect_collision(self.robot_pos, self.robot_radius, rect):
+                return True
+        return False
+
+    def _time_of_impact(self, start, previous_x):
+        """Earliest time of impact of the robot's move from ``start`` over the moved obstacles, or None."""
+        dx = self.robot_pos[0] - start[0]
+        dy = self.robot_pos[1] - start[1]
+        half_height = self.obstacle_height / 2
+
+        if self.obstacle_index is not None:
+            # Everything the swept circle can reach, plus how far the bars moved
+            reach = self.robot_radius + math.hypot(dx, dy) / 2 + max(
+                (abs(obs[0] - x) for obs, x in zip(self.obstacles, previous_x)), default=0.0)
+            nearby = self.obstacle_index.candidates((start[0] + dx / 2, start[1] + dy / 2), reach)
+        else:
+            nearby = range(len(self.obstacles))
+
+        impact = None
+        for i in nearby:
+            obs_x, obs_y, obs_width = self.obstacles[i]
+            x = previous_x[i]
+            rect = (x, obs_y - half_height, x + obs_width, obs_y + half_height)
+            t = time_of_impact(start, (dx, dy), self.robot_radius, rect, (obs_x - x, 0.0))
+            if t is not None and (impact is None or t < impact):
+                impact = t
+        return impact
+
+    def _check_goal_reached(self, start=None):
+        """Check if robot has reached the target (anywhere on the move from ``start``, if given)"""
+        dx = self.robot_pos[0] - self.target_pos[0]
+        dy = self.robot_pos[1] - self.target_pos[1]
+        if start is not None:
+            # Closest approach of the segment start -> robot_pos to the target
+            mx = self.robot_pos[0] - start[0]
+            my = self.robot_pos[1] - start[1]
+            length_squared = mx * mx + my * my
+            if length_squared > 0.0:
+                t = min(1.0, max(0.0, (dx * mx + dy * my) / length_squared))
+                dx -= t * mx
+                dy -= t * my
+        return math.sqrt(dx * dx + dy * dy) < self.goal_tolerance
+
+    def _sensed_obstacles(self):
+        """Obstacle reference points passed to the controllers."""
+        if self.obstacle_index is not None:
+            # Only points within range can affect get_obstacle_info
+            return self.obstacle_index.points_within(self.robot_pos, self.detection_range)
+        return [(obs[0], obs[1]) for obs in self.obstacles]
+
+    def step(self, dt=None):
+        """Advance the world by one timestep and return its outcome.
+
+        Returns RUNNING, COLLISION or GOAL. The world is not reset after a
+        collision or reaching the goal; that is left to the caller.
+        """
+        dt = self.dt if dt is None else dt
+        profiler = self.profiler
+        if profiler is not None:
+            step_start = lap = profiler.clock()
+
+        if self.continuous:
+            previous_x = [obs[0] for obs in self.obstacles]
+        self._update_obstacles(dt)
+        if profiler is not None:
+            lap = profiler.lap('obstacles', lap)
+
+        if self.sensor is not None:
+            self.ranges = self.sensor.scan(self.robot_pos, self.obstacles)
+            obstacle_info = self.sensor.nearest(self.ranges)
+        else:
+            obstacle_info = get_obstacle_info(self.robot_pos, self._sensed_obstacles())
+        observed = bool(self.observers)
+        if profiler is not None or observed:
+            if self.arbiter is not None:
+                # 'blend' when the arbiter mixes both controllers' outputs
+                weight = self.arbiter.weight(obstacle_info[1])
+                controller = 'obstacle' if weight >= 1.0 else 'goal' if weight <= 0.0 else 'blend'
+            else:
+                controller = 'obstacle' if obstacle_info[1] <= self.detection_range else 'goal'
+        if profiler is not None:
+            lap = profiler.lap('sensing', lap)
+
+        speed, direction = compute_fuzzy_control(
+            self.robot_pos,
+            self.target_pos,
+            [],
+            self.goal_controller,
+            self.obstacle_controller,
+            obstacle_info,
+            self.arbiter
+        )
+        if profiler is not None:
+            lap = profiler.lap('inference.' + controller, lap)
+        if observed:
+            self.control = {
+                'controller': controller,
+                'angle_to_goal': calculate_angle_to_target(self.robot_pos, self.target_pos),
+                'obstacle_angle': obstacle_info[0],
+                'obstacle_distance': obstacle_info[1],
+                'speed': speed,
+                'direction': direction,
+            }
+
+        start_x, start_y = self.robot_pos
+        self._move_robot(speed, direction, dt)
+        self.steps += 1
+        if profiler is not None:
+            lap = profiler.lap('kinematics', lap)
+
+        if self.continuous:
+            start = (start_x, start_y)
+            self.impact_time = self._time_of_impact(start, previous_x)
+            collided = self.impact_time is not None
+            if collided:
+                self.robot_pos[0] = start_x + self.impact_time * (self.robot_pos[0] - start_x)
+                self.robot_pos[1] = start_y + self.impact_time * (self.robot_pos[1] - start_y)
+        else:
+            start = None
+            collided = self._check_collision()
+
+        if collided:
+            status = COLLISION
+        else:
+            # Keep robot within bounds
+            self.robot_pos[0] = max(0.25, min(1.75, self.robot_pos[0]))
+            self.robot_pos[1] = max(0.25, min(1.75, self.robot_pos[1]))
+            status = GOAL if self._check_goal_reached(start) else RUNNING
+        self.path_length += math.hypot(self.robot_pos[0] - start_x, self.robot_pos[1] - start_y)
+        if profiler is not None:
+            lap = profiler.lap('collision', lap)
+
+        for observer in self.observers:
+            observer(self, status)
+        if profiler is not None:
+            profiler.lap('observers', lap)
+            profiler.end_step(controller, status, step_start)
+        return status
+
+    def run_episode(self, max_steps=10000, reset=True, seed=None):
+        """Step until a collision, the goal or ``max_steps``; return the final status."""
+        if reset:
+            self.reset_simulation(seed)
+        for _ in range(max_steps):
+            status = self.step()
+            if status != RUNNING:
+                return status
+        return TIMEOUT
@@ -0,0 +1,187 @@
+# montecarlo.py
+"""Parallel Monte Carlo evaluation of the controllers on random layouts.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m simulation.montecarlo --episodes 1000 --workers 8 --seed 0
+
+Episode ``i`` plays scenario ``i`` of ``ScenarioStream(seed)``, so results do
+not depend on the number of workers or on how episodes are sharded between
+them. Large sweeps can stream their per-episode results to a columnar store
+instead of keeping them in memory:
+
+    python -m simulation.montecarlo --episodes 1000000 --sink results/
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from controllers.arbitration import BlendedArbiter
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from .engine import SimulationEngine, GOAL, COLLISION, TIMEOUT
+from .results import ResultSink, ResultTable
+from .scenarios import ScenarioStream
+from .world import STATUSES
+
+# Per-process engine and scenario stream, built once by the pool initializer and reused by every shard
+_engine = None
+_stream = None
+_max_steps = None
+
+
+def _init_worker(compiled, dt, max_steps, blend=False, continuous=False, seed=0):
+    global _engine, _stream, _max_steps
+    goal_controller = GoalController(compiled=compiled)
+    obstacle_controller = ObstacleController(compiled=compiled)
+    arbiter = BlendedArbiter(goal_controller, obstacle_controller) if blend else None
+    _engine = SimulationEngine(goal_controller, obstacle_controller, dt=dt, arbiter=arbiter,
+                               continuous=continuous)
+    _stream = ScenarioStream(seed)
+    _max_steps = max_steps
+
+
+def run_scenario(engine, scenario, max_steps):
+    """Run one episode from ``scenario`` and return its outcome as a dict."""
+    engine.load_scenario(scenario)
+    status = engine.run_episode(max_steps, reset=False)
+    return {
+        'episode': scenario.index,
+        'status': status,
+        'steps': engine.steps,
+        'path_length': engine.path_length,
+    }
+
+
+def _run_shard(episodes):
+    return [run_scenario(_engine, _stream.scenario(i), _max_steps) for i in episodes]
+
+
+def _shard(episodes, shard_size):
+    return [episodes[i:i + shard_size] for i in range(0, len(episodes), shard_size)]
+
+
+def _ordered_map(executor, function, tasks, window):
+    # Like executor.map, but with at most ``window`` tasks submitted ahead of the consumer
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(function, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def summarize(results, dt=1.0):
+    """Aggregate per-episode results into success/collision rates and path statistics."""
+    return summarize_columns(np.array([STATUSES.index(r['status']) for r in results], dtype=np.int8),
+                             np.array([r['steps'] for r in results]),
+                             np.array([r['path_length'] for r in results], dtype=float), dt)
+
+
+def summarize_columns(status, steps, path_length, dt=1.0):
+    """``summarize`` of column arrays (status as indices into STATUSES), e.g. from a ResultTable."""
+    n = len(status)
+    goal = status == STATUSES.index(GOAL)
+
+    def describe(values):
+        if not len(values):
+            return None
+        return {'mean': float(np.mean(values)), 'median': float(np.median(values)),
+                'min': float(np.min(values)), 'max': float(np.max(values))}
+
+    return {
+        'episodes': n,
+        'success_rate': float(np.mean(goal)) if n else 0.0,
+        'collision_rate': float(np.mean(status == STATUSES.index(COLLISION))) if n else 0.0,
+        'timeout_rate': float(np.mean(status == STATUSES.index(TIMEOUT))) if n else 0.0,
+        # Time in frames of the interactive 80 Hz loop
+        'time_to_goal': describe(steps[goal] * dt),
+        'path_length': describe(path_length[goal]),
+        'path_length_all': describe(path_length),
+    }
+
+
+def evaluate(episodes, seed=0, workers=None, max_steps=10000, compiled=False, dt=1.0, shards_per_worker=4,
+             blend=False, continuous=False, sink=None, shard_size=10000):
+    """Run ``episodes`` scenarios of the stream on a process pool; return (results, summary).
+
+    With a ``sink`` (a ResultSink) every shard's results are written to it as
+    they arrive and ``results`` is None; the summary is then computed from the
+    rows written in this call.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = _shard(range(episodes), max(1, min(shard_size, -(-episodes // (workers * shards_per_worker)))))
+    options = (compiled, dt, max_steps, blend, continuous, seed)
+
+    start = time.perf_counter()
+    results = [] if sink is None else None
+    first_row = sink.rows if sink is not None else 0
+    executor = None
+    if workers == 1:
+        _init_worker(*options)
+        outcomes = map(_run_shard, shards)
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=options)
+        outcomes = _ordered_map(executor, _run_shard, shards, 2 * workers)
+    try:
+        for shard in outcomes:
+            if sink is None:
+                results.extend(shard)
+            else:
+                for r in shard:
+                    sink.append(dict(r, status=STATUSES.index(r['status'])))
+    finally:
+        if executor:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start
+
+    if sink is None:
+        summary = summarize(results, dt)
+    else:
+        sink.flush()
+        table = ResultTable(sink.path)
+        summary = summarize_columns(table['status'][first_row:], table['steps'][first_row:],
+                                    table['path_length'][first_row:], dt)
+    summary.update({'seed': seed, 'workers': workers, 'max_steps': max_steps, 'compiled': compiled,
+                    'blend': blend, 'continuous': continuous, 'dt': dt, 'elapsed_s': elapsed,
+                    'episodes_per_s': episodes / elapsed if elapsed else None})
+    return results, summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo evaluation of the fuzzy controllers")
+    parser.add_argument('--episodes', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the scenario stream")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument('--max-steps', type=int, default=10000)
+    parser.add_argument('--dt', type=float, default=1.0, help="timestep in frames of the 80 Hz loop")
+    parser.add_argument('--compiled', action='store_true', help="use lookup-table controllers")
+    parser.add_argument('--blend', action='store_true', help="blend the controllers instead of switching")
+    parser.add_argument('--continuous', action='store_true',
+                        help="swept collision and goal checks (safe with large --dt)")
+    parser.add_argument('--output', help="write summary and per-episode results to this JSON file")
+    parser.add_argument('--sink', help="append per-episode results to this columnar store (directory)")
+    parser.add_argument('--chunk-size', type=int, default=65536, help="rows per write to --sink")
+    args = parser.parse_args(argv)
+
+    sink = ResultSink(args.sink, chunk_size=args.chunk_size) if args.sink else None
+    try:
+        results, summary = evaluate(args.episodes, args.seed, args.workers, args.max_steps,
+                                    args.compiled, args.dt, blend=args.blend, continuous=args.continuous,
+                                    sink=sink)
+    finally:
+        if sink:
+            sink.close()
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'summary': summary, 'episodes': results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
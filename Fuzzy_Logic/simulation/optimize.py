@@ -0,0 +1,272 @@
+# optimize.py
+"""Evolutionary search over the fuzzy rule bases.
+
+A candidate (genome) holds the breakpoints of every membership function of
+both controllers and the consequents of the obstacle avoidance rules. Each
+generation is scored on the same seeded episodes (common random numbers), run
+as one BatchWorld per candidate so inference is batched across episodes;
+candidates are spread over a process pool. The best rule base found so far is
+checkpointed after every generation, and the run can be resumed from it.
+
+Usage (from the Fuzzy_Logic directory):
+
+    python -m simulation.optimize --generations 20 --population 16 --episodes 64 \\
+        --workers 8 --checkpoint best_rules.json
+
+Controllers of a checkpoint: ``build_controllers(load_checkpoint(path)['best'])``.
+"""
+import argparse
+import copy
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import OBSTACLE_RULES, ObstacleController
+from .world import BatchWorld, COLLISION_CODE, GOAL_CODE
+
+
+# Score of a degenerate candidate; fitness of a simulated one is at least -0.5
+REJECTED_FITNESS = -1.0
+
+
+def _breakpoints(controller):
+    """{variable: {term: [x, ...]}} of every trimf/trapmf term of a controller."""
+    memberships = {}
+    for variable in vars(controller).values():
+        if hasattr(variable, 'terms') and hasattr(variable, 'universe'):
+            memberships[variable.label] = {label: [x for x, _ in term.breakpoints]
+                                           for label, term in variable.terms.items()}
+    return memberships
+
+
+def default_genome():
+    """The hand-tuned memberships with the drafted avoidance rules switched on."""
+    return {
+        'goal': _breakpoints(GoalController()),
+        'obstacle': _breakpoints(ObstacleController()),
+        'obstacle_rules': [list(consequent) for _, consequent in OBSTACLE_RULES],
+    }
+
+
+def build_controllers(genome, **kwargs):
+    """GoalController and ObstacleController of a genome (``kwargs``: e.g. compiled, analytic)."""
+    rule_table = [(antecedent, tuple(consequent))
+                  for (antecedent, _), consequent in zip(OBSTACLE_RULES, genome['obstacle_rules'])]
+    return (GoalController(memberships=genome['goal'], **kwargs),
+            ObstacleController(memberships=genome['obstacle'], rule_table=rule_table, **kwargs))
+
+
+class SearchSpace:
+    """Bounds of every breakpoint and the choice of consequent terms.
+
+    Every breakpoint is bounded by the universe of its variable, so mutated
+    and crossed-over candidates only hold breakpoints inside it.
+    """
+
+    def __init__(self, genome):
+        goal, obstacle = build_controllers(genome)
+        self.bounds = {}
+        for key, controller in (('goal', goal), ('obstacle', obstacle)):
+            for variable, terms in genome[key].items():
+                universe = getattr(controller, variable).universe
+                for term in terms:
+                    # Breakpoints beyond the universe only move a term that cannot be sampled
+                    self.bounds[key, variable, term] = (float(universe[0]), float(universe[-1]))
+        self.directions = list(obstacle.robot_direction.terms)
+        self.speeds = list(obstacle.robot_speed.terms)
+
+    def mutate(self, genome, rng, sigma, rule_rate):
+        """Gaussian steps of ``sigma`` x range on the breakpoints, random consequent swaps."""
+        child = copy.deepcopy(genome)
+        for (key, variable, term), (low, high) in self.bounds.items():
+            params = np.asarray(child[key][variable][term], dtype=float)
+            child[key][variable][term] = params + rng.normal(0.0, sigma * (high - low), len(params))
+        self.clamp(child)
+        for consequent in child['obstacle_rules']:
+            if rng.random() < rule_rate:
+                consequent[0] = self.directions[rng.integers(len(self.directions))]
+            if rng.random() < rule_rate:
+                consequent[1] = self.speeds[rng.integers(len(self.speeds))]
+        return child
+
+    def crossover(self, first, second, rng):
+        """Uniform crossover by whole membership function and whole rule."""
+        child = copy.deepcopy(first)
+        for key, variable, term in self.bounds:
+            if rng.random() < 0.5:
+                child[key][variable][term] = list(second[key][variable][term])
+        for i, consequent in enumerate(second['obstacle_rules']):
+            if rng.random() < 0.5:
+                child['obstacle_rules'][i] = list(consequent)
+        return self.clamp(child)
+
+    def clamp(self, genome):
+        """Clip the breakpoints of ``genome`` (in place) to their bounds, keeping them sorted."""
+        for (key, variable, term), (low, high) in self.bounds.items():
+            params = np.asarray(genome[key][variable][term], dtype=float)
+            genome[key][variable][term] = np.sort(np.clip(params, low, high)).tolist()
+        return genome
+
+
+def degenerate(goal_controller, obstacle_controller):
+    """Why the controllers of a candidate are not worth simulating, or None.
+
+    A candidate is degenerate when one of its output terms is zero on the
+    whole universe (e.g. squeezed between two samples), or when the goal
+    rules leave some angle without a firing rule. Either way the controller
+    would answer with its no-rule fallback, which drives much faster than
+    any rule.
+    """
+    for controller in (goal_controller, obstacle_controller):
+        for variable in (controller.robot_speed, controller.robot_direction):
+            for label, term in variable.terms.items():
+                if not term.mf.any():
+                    return "{}[{}] is zero on its universe".format(variable.label, label)
+    _, valid = goal_controller.rule_base.compute_batch(angle_to_goal=goal_controller.angle_to_goal.universe)
+    if not valid.all():
+        return "no goal rule fires at some angles"
+    return None
+
+
+def evaluate(genome, episodes=64, seed=0, max_steps=2000, dt=4.0):
+    """Score a genome on ``episodes`` seeded episodes run side by side in a BatchWorld.
+
+    Fitness rewards reaching the goal, penalizes collisions and credits the
+    fraction of the initial distance to the target that was covered.
+    Candidates are run on the sampled rule bases: lookup tables of the
+    avoidance rules cannot meet their error bound at the step where the
+    no-rule fallback takes over. Degenerate candidates are not run and score
+    REJECTED_FITNESS, below any fitness an episode can reach.
+    """
+    goal_controller, obstacle_controller = build_controllers(genome)
+    reason = degenerate(goal_controller, obstacle_controller)
+    if reason is not None:
+        return {'fitness': REJECTED_FITNESS, 'success_rate': 0.0, 'collision_rate': 0.0, 'progress': 0.0,
+                'steps': 0.0, 'rejected': reason}
+    world = BatchWorld(episodes, goal_controller, obstacle_controller, seed=seed, dt=dt)
+    initial = np.linalg.norm(world.target_pos - world.robot_pos, axis=1)
+    status = world.run(max_steps)
+
+    final = np.linalg.norm(world.target_pos - world.robot_pos, axis=1)
+    progress = np.clip(1.0 - final / initial, 0.0, 1.0)
+    success = float(np.mean(status == GOAL_CODE))
+    collision = float(np.mean(status == COLLISION_CODE))
+    return {
+        'fitness': success - 0.5 * collision + 0.5 * float(progress.mean()),
+        'success_rate': success,
+        'collision_rate': collision,
+        'progress': float(progress.mean()),
+        'steps': float(world.steps.mean()),
+    }
+
+
+def _evaluate_task(task):
+    genome, options = task
+    return evaluate(genome, **options)
+
+
+def save_checkpoint(path, state):
+    # Write next to the target and rename, so an interrupted run never leaves a torn file
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def search(generations=20, population=16, episodes=64, seed=0, workers=None, max_steps=2000, dt=4.0,
+           elite=2, sigma=0.05, rule_rate=0.1, checkpoint=None, resume=False):
+    """Genetic search with elitism; returns the final checkpoint state.
+
+    Resuming requires the evaluation options the checkpoint was run with.
+    When no generation is left to run, the loaded (or initial, unscored)
+    state is returned as it is.
+    """
+    rng = np.random.default_rng(seed)
+    options = {'episodes': episodes, 'seed': seed, 'max_steps': max_steps, 'dt': dt}
+    start_generation = 0
+    history = []
+    best = None
+
+    if resume and checkpoint and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        if state['options'] != options:
+            # Scores under other episodes, dt or max_steps are not comparable with new ones
+            raise ValueError("checkpoint {} was run with {}, not {}".format(checkpoint, state['options'], options))
+        pool = state['population']
+        start_generation = state['generation'] + 1
+        history = state['history']
+        best = {'genome': state['best'], 'score': state['best_score']}
+        rng = np.random.default_rng([seed, start_generation])
+    else:
+        base = default_genome()
+        pool = [base] + [SearchSpace(base).mutate(base, rng, sigma, rule_rate) for _ in range(population - 1)]
+        # Nothing scored yet: what a run with no generations left returns
+        state = {'generation': -1, 'options': options, 'best': base, 'best_score': None, 'history': history,
+                 'population': pool}
+    space = SearchSpace(pool[0])
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for generation in range(start_generation, generations):
+            started = time.perf_counter()
+            tasks = [(genome, options) for genome in pool]
+            scores = list(executor.map(_evaluate_task, tasks) if executor else map(_evaluate_task, tasks))
+            elapsed = time.perf_counter() - started
+
+            ranked = sorted(zip(scores, pool), key=lambda pair: -pair[0]['fitness'])
+            if best is None or ranked[0][0]['fitness'] > best['score']['fitness']:
+                best = {'genome': ranked[0][1], 'score': ranked[0][0]}
+            history.append({'generation': generation, 'best_fitness': ranked[0][0]['fitness'],
+                            'mean_fitness': float(np.mean([s['fitness'] for s in scores])),
+                            'episodes_per_s': len(pool) * episodes / elapsed})
+            print("generation {:3d}  best {:.4f}  mean {:.4f}  {:.1f} episodes/s".format(
+                generation, history[-1]['best_fitness'], history[-1]['mean_fitness'],
+                history[-1]['episodes_per_s']), flush=True)
+
+            # Next generation: elites, then children of tournament-selected parents
+            parents = [genome for _, genome in ranked]
+            pool = parents[:elite]
+            while len(pool) < population:
+                first, second = (min(rng.integers(len(parents), size=2)) for _ in range(2))
+                child = space.crossover(parents[first], parents[second], rng)
+                pool.append(space.mutate(child, rng, sigma, rule_rate))
+
+            state = {'generation': generation, 'options': options, 'best': best['genome'],
+                     'best_score': best['score'], 'history': history, 'population': pool}
+            if checkpoint:
+                save_checkpoint(checkpoint, state)
+    finally:
+        if executor:
+            executor.shutdown()
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genetic search over the fuzzy rule bases")
+    parser.add_argument('--generations', type=int, default=20)
+    parser.add_argument('--population', type=int, default=16)
+    parser.add_argument('--episodes', type=int, default=64, help="seeded episodes per candidate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument('--max-steps', type=int, default=2000)
+    parser.add_argument('--dt', type=float, default=4.0, help="timestep in frames of the 80 Hz loop")
+    parser.add_argument('--sigma', type=float, default=0.05, help="mutation step as a fraction of the range")
+    parser.add_argument('--checkpoint', default='best_rules.json')
+    parser.add_argument('--resume', action='store_true', help="continue from --checkpoint")
+    args = parser.parse_args(argv)
+
+    state = search(args.generations, args.population, args.episodes, args.seed, args.workers, args.max_steps,
+                   args.dt, sigma=args.sigma, checkpoint=args.checkpoint, resume=args.resume)
+    print(json.dumps(state['best_score'], indent=2))
+
+
+if __name__ == "__main__":
+    main()
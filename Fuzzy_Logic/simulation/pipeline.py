@@ -0,0 +1,70 @@
+# pipeline.py
+import threading
+import time
+from collections import namedtuple
+from .engine import RUNNING
+
+# Immutable copy of the world after one step, handed from the control thread to the view
+Frame = namedtuple('Frame', ['robot_pos', 'target_pos', 'obstacles', 'status', 'steps'])
+
+
+def snapshot(engine, status=RUNNING):
+    return Frame(tuple(engine.robot_pos), tuple(engine.target_pos),
+                 tuple(tuple(obs) for obs in engine.obstacles), status, engine.steps)
+
+
+class ControlThread(threading.Thread):
+    """Steps a SimulationEngine on its own thread at ``rate`` Hz.
+
+    The latest state is published as ``frame`` (a Frame, replaced atomically)
+    so a view can draw frame N while the controllers already compute N+1.
+    ``rate=None`` steps as fast as inference allows. The thread pauses itself
+    when an episode ends, until ``reset`` is called.
+    """
+
+    def __init__(self, engine, rate=80.0):
+        super().__init__(name='control', daemon=True)
+        self.engine = engine
+        self.period = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()  # held while the engine is stepped or reset
+        self.frame = snapshot(engine)
+        self.steps = 0
+        self._active = threading.Event()
+        self._active.set()
+        self._stopped = threading.Event()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        while not self._stopped.is_set():
+            if not self._active.wait(0.05):
+                next_tick = time.perf_counter()
+                continue
+
+            with self.lock:
+                status = self.engine.step()
+                # Pause before publishing the final frame, so a reset() prompted by it is not undone
+                if status != RUNNING:
+                    self._active.clear()
+                self.frame = snapshot(self.engine, status)
+            self.steps += 1
+
+            if self.period:
+                next_tick += self.period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    self._stopped.wait(delay)
+                else:
+                    next_tick = time.perf_counter()  # running late: do not try to catch up
+
+    def reset(self, seed=None):
+        """Start a new episode and resume stepping."""
+        with self.lock:
+            self.engine.reset_simulation(seed)
+            self.frame = snapshot(self.engine)
+        self._active.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._active.set()
+        if self.is_alive():
+            self.join()
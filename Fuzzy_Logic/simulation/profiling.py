@@ -0,0 +1,121 @@
+# profiling.py
+"""Per-stage timing of the control loop.
+
+A StepProfiler attached to SimulationEngine (``profiler=...``) times every
+stage of ``step`` with the monotonic ``time.perf_counter_ns`` clock:
+
+    obstacles           moving the obstacles
+    sensing             get_obstacle_info or the range sensor scan
+    inference.goal      fuzzy inference when the goal controller decides
+    inference.obstacle  the same for the obstacle controller
+    inference.blend     the same when an arbiter blends both controllers
+    kinematics          moving the robot
+    collision           collision, bounds and goal checks
+    observers           observers; in RobotSimulator this is the rendering
+
+Without a profiler the engine only pays one ``is not None`` test per stage.
+"""
+import json
+import time
+
+
+class StepProfiler:
+    """Stage timers, counters and log2 latency histograms of engine steps.
+
+    Histogram bucket ``b`` counts stage durations ``d`` in microseconds with
+    ``2**(b-1) <= d < 2**b`` (bucket 0: under 1 us). With ``trace=True`` the
+    first ``max_events`` stage timings are also kept as Chrome trace events.
+    Stages timed outside the engine (e.g. the simulator's ``frame_wait``) can
+    be added with ``lap``/``add`` as well.
+    """
+
+    # Stages of SimulationEngine.step, reported as shares of the step time
+    STEP_STAGES = ('obstacles', 'sensing', 'inference.goal', 'inference.obstacle', 'inference.blend',
+                   'kinematics', 'collision', 'observers')
+
+    def __init__(self, trace=False, max_events=1000000):
+        self.clock = time.perf_counter_ns
+        self.trace = trace
+        self.max_events = max_events
+        self.reset()
+
+    def reset(self):
+        self.steps = 0
+        self.stages = {}  # stage -> [total_ns, calls, histogram]
+        self.controllers = {'goal': 0, 'obstacle': 0, 'blend': 0}
+        self.statuses = {}
+        self.events = []
+        self._origin = self.clock()
+
+    def add(self, stage, elapsed_ns, start_ns=None):
+        """Account ``elapsed_ns`` to ``stage`` (``start_ns`` places it on the trace)."""
+        record = self.stages.get(stage)
+        if record is None:
+            record = self.stages[stage] = [0, 0, [0] * 40]
+        record[0] += elapsed_ns
+        record[1] += 1
+        record[2][min(39, (elapsed_ns // 1000).bit_length())] += 1
+
+        if self.trace and len(self.events) < self.max_events:
+            start_ns = self.clock() - elapsed_ns if start_ns is None else start_ns
+            self.events.append((stage, start_ns, elapsed_ns))
+
+    def lap(self, stage, start_ns):
+        """Account the time since ``start_ns`` to ``stage`` and return the current time."""
+        now = self.clock()
+        self.add(stage, now - start_ns, start_ns)
+        return now
+
+    def end_step(self, controller, status, start_ns):
+        self.steps += 1
+        self.controllers[controller] += 1
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.add('step', self.clock() - start_ns, start_ns)
+
+    def summary(self):
+        """Per-stage totals, means, shares of the step time and histograms, as a plain dict."""
+        step_ns = self.stages['step'][0] if 'step' in self.stages else 0
+        stages = {}
+        for stage, (total, calls, histogram) in self.stages.items():
+            last = max(b for b, count in enumerate(histogram) if count)
+            stages[stage] = {
+                'calls': calls,
+                'total_ms': total / 1e6,
+                'mean_us': total / calls / 1e3,
+                'share_of_step': total / step_ns if step_ns and stage in self.STEP_STAGES else None,
+                'histogram_us': {_bucket_label(b): histogram[b] for b in range(last + 1)},
+            }
+        return {'steps': self.steps, 'controllers': dict(self.controllers),
+                'statuses': dict(self.statuses), 'stages': stages}
+
+    def save_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def chrome_trace(self):
+        """Recorded stage timings in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = [{'name': stage, 'cat': 'step' if stage == 'step' else 'stage', 'ph': 'X',
+                   'ts': (start - self._origin) / 1e3, 'dur': elapsed / 1e3, 'pid': 0, 'tid': 0}
+                  for stage, start, elapsed in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def __str__(self):
+        summary = self.summary()
+        lines = ["{} steps, controllers: {}".format(summary['steps'], summary['controllers']),
+                 "{:<20} {:>9} {:>11} {:>10} {:>7}".format('stage', 'calls', 'total ms', 'mean us', 'share')]
+        for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_ms']):
+            share = stats['share_of_step']
+            lines.append("{:<20} {:>9} {:>11.2f} {:>10.2f} {:>7}".format(
+                stage, stats['calls'], stats['total_ms'], stats['mean_us'],
+                '' if share is None else '{:.1%}'.format(share)))
+        return "\n".join(lines)
+
+
+def _bucket_label(bucket):
+    if bucket == 0:
+        return '<1'
+    return '{}-{}'.format(1 << (bucket - 1), 1 << bucket)
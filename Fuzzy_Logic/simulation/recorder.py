@@ -0,0 +1,158 @@
+# recorder.py
+"""Compact binary trajectory logs and memory-mapped replay.
+
+A log file is a short JSON header followed by fixed-size records of a NumPy
+structured dtype, one per simulation step:
+
+    magic (8 bytes) | header length (uint32) | JSON header | records...
+
+The header stores the record dtype, so ``TrajectoryLog`` can ``np.memmap``
+the records without loading them, however long the run was.
+"""
+import json
+import os
+import struct
+import numpy as np
+from .engine import COLLISION
+from .world import STATUSES
+
+MAGIC = b'FLTRAJ01'
+CONTROLLERS = ('goal', 'obstacle', 'blend')
+
+
+def record_dtype(n_obstacles, n_beams=0):
+    """Structured dtype of one step record."""
+    fields = [
+        ('episode', '<i4'),
+        ('step', '<i4'),
+        ('status', 'i1'),
+        ('controller', 'i1'),  # index into CONTROLLERS
+        ('robot', '<f8', (2,)),
+        ('target', '<f8', (2,)),
+        ('obstacles', '<f8', (n_obstacles, 3)),  # x, y, width
+        ('obstacle_directions', 'i1', (n_obstacles,)),
+        ('angle_to_goal', '<f8'),
+        ('obstacle_angle', '<f8'),
+        ('obstacle_distance', '<f8'),
+        ('speed', '<f8'),
+        ('direction', '<f8'),
+    ]
+    if n_beams:
+        fields.append(('ranges', '<f8', (n_beams,)))
+    return np.dtype(fields)
+
+
+class TrajectoryRecorder:
+    """Engine observer appending one record per step to a binary log.
+
+    Records are collected in a preallocated chunk of ``chunk_size`` rows and
+    written out whenever it fills up (and on ``flush``/``close``), so memory
+    use does not grow with the length of the run.
+    """
+
+    def __init__(self, path, n_obstacles=4, n_beams=0, chunk_size=4096):
+        self.path = path
+        self.dtype = record_dtype(n_obstacles, n_beams)
+        self.n_beams = n_beams
+        self.buffer = np.zeros(chunk_size, dtype=self.dtype)
+        self.count = 0
+        self.written = 0
+
+        header = json.dumps({'descr': np.lib.format.dtype_to_descr(self.dtype),
+                             'n_obstacles': n_obstacles, 'n_beams': n_beams}).encode()
+        # Pad so records start at an 8-byte aligned offset
+        header += b' ' * (-(len(MAGIC) + 4 + len(header)) % 8)
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def __call__(self, engine, status):
+        row = self.buffer[self.count]
+        control = engine.control
+        row['episode'] = engine.episode
+        row['step'] = engine.steps
+        row['status'] = STATUSES.index(status)
+        row['controller'] = CONTROLLERS.index(control['controller'])
+        row['robot'] = engine.robot_pos
+        row['target'] = engine.target_pos
+        row['obstacles'] = engine.obstacles
+        row['obstacle_directions'] = engine.obstacle_directions
+        row['angle_to_goal'] = control['angle_to_goal']
+        row['obstacle_angle'] = control['obstacle_angle']
+        row['obstacle_distance'] = control['obstacle_distance']
+        row['speed'] = control['speed']
+        row['direction'] = control['direction']
+        if self.n_beams:
+            row['ranges'] = engine.ranges
+
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if self.count:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.written += self.count
+            self.count = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrajectoryLog:
+    """Read-only, memory-mapped view of a log written by TrajectoryRecorder.
+
+    ``records`` is an ``np.memmap`` of the structured records; indexing and
+    column access only page in the parts that are touched.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a trajectory log".format(path))
+            header_length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_length))
+
+        self.path = path
+        self.n_obstacles = header['n_obstacles']
+        self.n_beams = header['n_beams']
+        # JSON turns the (name, format[, shape]) tuples of the descr into lists
+        self.dtype = np.lib.format.descr_to_dtype(
+            [(field[0], field[1]) + tuple(tuple(shape) for shape in field[2:]) for field in header['descr']])
+        offset = len(MAGIC) + 4 + header_length
+        count = (os.path.getsize(path) - offset) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=offset, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)  # mmap cannot map an empty range
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def where(self, mask_function, chunk_size=1 << 16):
+        """Indices of records for which ``mask_function(chunk)`` is True, scanned chunk by chunk."""
+        found = []
+        for start in range(0, len(self.records), chunk_size):
+            chunk = self.records[start:start + chunk_size]
+            found.append(np.flatnonzero(mask_function(chunk)) + start)
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+    def episode(self, number):
+        """Records of one episode."""
+        return self.records[self.where(lambda chunk: chunk['episode'] == number)]
+
+    def collisions(self):
+        """Indices of the steps that ended in a collision."""
+        return self.where(lambda chunk: chunk['status'] == STATUSES.index(COLLISION))
+
@@ -0,0 +1,126 @@
+# results.py
+"""Append-only columnar store of per-episode results.
+
+A store is a directory with one raw little-endian file per column and a JSON
+schema:
+
+    schema.json          {"columns": [[name, dtype], ...]}
+    <name>.bin           the values of one column, back to back
+
+``ResultSink`` buffers rows in a fixed-size chunk and appends it to the
+column files whenever it fills up, so memory stays constant however many
+episodes are written. ``ResultTable`` memory-maps the columns for reading.
+"""
+import json
+import os
+import numpy as np
+
+# Columns written by the Monte Carlo sweeps; status is an index into world.STATUSES
+EPISODE_COLUMNS = (('episode', '<i8'), ('status', 'i1'), ('steps', '<i4'), ('path_length', '<f8'))
+
+
+def _column_path(path, name):
+    return os.path.join(path, name + '.bin')
+
+
+def _read_schema(path):
+    with open(os.path.join(path, 'schema.json')) as f:
+        return [(name, np.dtype(dtype)) for name, dtype in json.load(f)['columns']]
+
+
+class ResultSink:
+    """Writes rows to a result store in chunks of ``chunk_size``.
+
+    An existing store with the same columns is appended to, after dropping
+    any rows a previous writer left incomplete. ``rows`` counts the rows in
+    the store including those still buffered.
+    """
+
+    def __init__(self, path, columns=EPISODE_COLUMNS, chunk_size=65536):
+        self.path = path
+        self.columns = [(name, np.dtype(dtype)) for name, dtype in columns]
+        self.buffer = np.zeros(chunk_size, dtype=self.columns)
+        self.count = 0
+        self.written = 0
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'schema.json')):
+            if _read_schema(path) != self.columns:
+                raise ValueError("{} holds results with other columns".format(path))
+            self.written = len(ResultTable(path))
+            for name, dtype in self.columns:
+                with open(_column_path(path, name), 'ab') as f:
+                    f.truncate(self.written * dtype.itemsize)
+        else:
+            with open(os.path.join(path, 'schema.json'), 'w') as f:
+                json.dump({'columns': [(name, dtype.str) for name, dtype in self.columns]}, f)
+        self.files = {name: open(_column_path(path, name), 'ab') for name, _ in self.columns}
+
+    @property
+    def rows(self):
+        return self.written + self.count
+
+    def append(self, row):
+        """Add one row given as a mapping of column name to value."""
+        record = self.buffer[self.count]
+        for name, _ in self.columns:
+            record[name] = row[name]
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        if self.count:
+            for name, _ in self.columns:
+                self.files[name].write(self.buffer[name][:self.count].tobytes())
+            self.written += self.count
+            self.count = 0
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        if self.files:
+            self.flush()
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultTable:
+    """Read-only, memory-mapped columns of a result store.
+
+    ``table['status']`` is an ``np.memmap`` of one column. A store cut short
+    while a chunk was being written is read up to its last complete row.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dtypes = dict(_read_schema(path))
+        self.length = min((os.path.getsize(_column_path(path, name)) // dtype.itemsize
+                           if os.path.exists(_column_path(path, name)) else 0
+                           for name, dtype in self.dtypes.items()), default=0)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, name):
+        dtype = self.dtypes[name]
+        if not self.length:
+            return np.zeros(0, dtype=dtype)  # mmap cannot map an empty range
+        return np.memmap(_column_path(self.path, name), dtype=dtype, mode='r', shape=(self.length,))
+
+    def chunks(self, columns=None, chunk_size=1 << 16):
+        """Dicts of column arrays of up to ``chunk_size`` rows each."""
+        columns = {name: self[name] for name in (columns or self.dtypes)}
+        for start in range(0, self.length, chunk_size):
+            yield {name: np.asarray(values[start:start + chunk_size]) for name, values in columns.items()}
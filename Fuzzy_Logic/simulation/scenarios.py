@@ -0,0 +1,73 @@
+# scenarios.py
+"""Reproducible stream of episode layouts.
+
+Scenario ``i`` of a stream is drawn from its own generator, seeded by
+``(seed, i)``, with the same distributions as SimulationEngine. It therefore
+does not depend on which scenarios were drawn before it, on which worker
+draws it, or on how the stream was partitioned, and any slice of a sweep can
+be regenerated on its own.
+"""
+import itertools
+from collections import namedtuple
+import numpy as np
+
+Scenario = namedtuple('Scenario', ['index', 'robot_pos', 'target_pos', 'obstacles',
+                                   'obstacle_speeds', 'obstacle_directions'])
+
+
+class ScenarioStream:
+    """Scenarios ``start, start + step, ...`` (up to ``stop``, or endless) of a seeded stream.
+
+    ``partition(part, n_parts)`` returns the ``part``-th of ``n_parts``
+    interleaved sub-streams; the sub-streams do not overlap and together cover
+    this stream.
+    """
+
+    def __init__(self, seed=0, n_obstacles=4, start=0, stop=None, step=1):
+        self.seed = seed
+        self.n_obstacles = n_obstacles
+        self.start = start
+        self.stop = stop
+        self.step = step
+
+    def scenario(self, index):
+        """Scenario ``index`` of the stream (independent of ``start``/``stop``/``step``)."""
+        rng = np.random.default_rng([self.seed, index])
+        k = self.n_obstacles
+        target_pos = (float(rng.uniform(0.5, 1.5)), float(rng.uniform(1.7, 1.9)))
+        widths = rng.uniform(0.3, 0.5, k)
+        xs = rng.uniform(0.2, 1.8 - widths)
+        obstacles = tuple((float(x), float(y), float(width))
+                          for x, y, width in zip(xs, np.linspace(0.7, 1.4, k), widths))
+        speeds = tuple(rng.uniform(0.0002, 0.0005, k).tolist())
+        directions = tuple(1 if r > 0.5 else -1 for r in rng.random(k))
+        return Scenario(index, (1.0, 0.05), target_pos, obstacles, speeds, directions)
+
+    def indices(self):
+        if self.stop is None:
+            return itertools.count(self.start, self.step)
+        return iter(range(self.start, self.stop, self.step))
+
+    def __iter__(self):
+        for index in self.indices():
+            yield self.scenario(index)
+
+    def __len__(self):
+        if self.stop is None:
+            raise TypeError("endless scenario stream has no length")
+        return len(range(self.start, self.stop, self.step))
+
+    def partition(self, part, n_parts):
+        if not 0 <= part < n_parts:
+            raise ValueError("part must be in [0, n_parts)")
+        return ScenarioStream(self.seed, self.n_obstacles, self.start + part * self.step,
+                              self.stop, self.step * n_parts)
+
+    def batches(self, size):
+        """Lists of up to ``size`` consecutive scenarios, e.g. for BatchWorld.load_scenarios."""
+        scenarios = iter(self)
+        while True:
+            batch = list(itertools.islice(scenarios, size))
+            if not batch:
+                return
+            yield batch
@@ -0,0 +1,86 @@
+# sensors.py
+import numpy as np
+
+
+class RangeSensorRing:
+    """Simulated ring of IR distance sensors around the robot body.
+
+    Like the Robotino's ring, ``n_beams`` sensors are spread evenly around
+    the robot, the first one looking straight ahead (+y). Each beam starts on
+    the body surface (``origin_offset`` from the center) and reports the
+    distance to the first obstacle rectangle it hits, or ``inf`` beyond
+    ``max_range``. Angles use the same convention as get_obstacle_info
+    (degrees of atan2 in the world frame).
+
+    ``scan`` casts all beams of one or many robots against all obstacles in a
+    single vectorized slab test.
+    """
+
+    def __init__(self, n_beams=9, max_range=0.4, origin_offset=0.25, obstacle_height=0.1):
+        self.n_beams = n_beams
+        self.max_range = max_range
+        self.origin_offset = origin_offset
+        self.half_height = obstacle_height / 2
+        self.beam_angles = (90.0 + np.arange(n_beams) * 360.0 / n_beams + 180.0) % 360.0 - 180.0
+        radians = np.radians(self.beam_angles)
+        self.directions = np.column_stack([np.cos(radians), np.sin(radians)])
+
+    def scan(self, robot_pos, obstacles):
+        """Ranges of every beam.
+
+        ``robot_pos`` has shape (2,) or (N, 2); ``obstacles`` (K, 3) or
+        (N, K, 3) with columns x, y, width. Returns shape (n_beams,) or
+        (N, n_beams).
+        """
+        robot_pos = np.asarray(robot_pos, dtype=float)
+        obstacles = np.asarray(obstacles, dtype=float)
+        single = robot_pos.ndim == 1
+        robot_pos = np.atleast_2d(robot_pos)
+        if obstacles.ndim == 2:
+            obstacles = obstacles[None]
+        if obstacles.shape[1] == 0:
+            ranges = np.full((len(robot_pos), self.n_beams), np.inf)
+            return ranges[0] if single else ranges
+
+        # Beam origins on the body surface: (N, B, 1) per axis
+        dx = self.directions[None, :, 0:1]
+        dy = self.directions[None, :, 1:2]
+        ox = robot_pos[:, None, 0:1] + self.origin_offset * dx
+        oy = robot_pos[:, None, 1:2] + self.origin_offset * dy
+
+        # Rectangle bounds: (N or 1, 1, K)
+        left = obstacles[:, None, :, 0]
+        right = left + obstacles[:, None, :, 2]
+        bottom = obstacles[:, None, :, 1] - self.half_height
+        top = obstacles[:, None, :, 1] + self.half_height
+
+        # Slab intersection
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tx1, tx2 = (left - ox) / dx, (right - ox) / dx
+            ty1, ty2 = (bottom - oy) / dy, (top - oy) / dy
+        t_near = np.fmax(np.fmin(tx1, tx2), np.fmin(ty1, ty2))
+        t_far = np.fmin(np.fmax(tx1, tx2), np.fmax(ty1, ty2))
+
+        # Beams parallel to a slab get +-inf there, or NaN (ignored) on its edge
+        hit = t_far >= np.maximum(t_near, 0.0)
+        distance = np.where(hit, np.maximum(t_near, 0.0), np.inf).min(axis=2)
+        ranges = np.where(distance <= self.max_range, distance, np.inf)
+        return ranges[0] if single else ranges
+
+    def nearest(self, ranges):
+        """Angle and distance of the closest reading (first beam on ties).
+
+        Returns ``(0, inf)`` where no beam sees anything, like
+        get_obstacle_info. Works on (n_beams,) or (N, n_beams) readings.
+        """
+        ranges = np.asarray(ranges, dtype=float)
+        beam = np.argmin(ranges, axis=-1)
+        distance = np.take_along_axis(ranges, np.expand_dims(beam, -1), axis=-1)[..., 0]
+        angle = self.beam_angles[beam]
+        # Fold into [-95, 95] as the controllers expect
+        angle = np.where(angle > 95, angle - 180, angle)
+        angle = np.where(angle < -95, angle + 180, angle)
+        angle = np.where(np.isinf(distance), 0.0, angle)
+        if ranges.ndim == 1:
+            return float(angle), float(distance)
+        return angle, distance
@@ -0,0 +1,186 @@
+# world.py
+import numpy as np
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import ObstacleController
+from utils.utils import compute_fuzzy_control_batch
+from .collision import time_of_impact_batch
+from .engine import SimulationEngine, RUNNING, COLLISION, GOAL, TIMEOUT
+
+# Index of each outcome in the status array
+STATUSES = (RUNNING, COLLISION, GOAL, TIMEOUT)
+RUNNING_CODE, COLLISION_CODE, GOAL_CODE, TIMEOUT_CODE = range(len(STATUSES))
+
+
+class BatchWorld:
+    """N independent episodes of SimulationEngine stored as NumPy arrays.
+
+    State lives in contiguous structure-of-arrays form:
+
+    * ``robot_pos``, ``target_pos`` - shape (N, 2)
+    * ``obstacles`` - shape (N, K, 3), columns x, y, width
+    * ``obstacle_speeds``, ``obstacle_directions`` - shape (N, K)
+    * ``status`` - index into STATUSES, ``steps`` - steps taken per episode
+
+    ``step`` advances every running episode with one vectorized call per
+    stage (obstacle motion, batched fuzzy inference, kinematics, collision,
+    bounds and goal checks). Finished episodes are frozen in place.
+
+    With a ``sensor`` (e.g. RangeSensorRing) the beams of all running robots
+    are cast in the same pass and their readings drive the obstacle controller.
+    An ``arbiter`` and ``continuous`` collision and goal checks are used as
+    in SimulationEngine.
+    """
+
+    robot_radius = SimulationEngine.robot_radius
+    obstacle_height = SimulationEngine.obstacle_height
+    goal_tolerance = SimulationEngine.goal_tolerance
+    move_scale = SimulationEngine.move_scale
+
+    def __init__(self, n_episodes, goal_controller=None, obstacle_controller=None, seed=None,
+                 n_obstacles=4, dt=1.0, sensor=None, arbiter=None, continuous=False):
+        self.n_episodes = n_episodes
+        self.n_obstacles = n_obstacles
+        self.goal_controller = goal_controller or GoalController()
+        self.obstacle_controller = obstacle_controller or ObstacleController()
+        self.dt = dt
+        self.sensor = sensor
+        self.arbiter = arbiter
+        self.continuous = continuous
+
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Draw new random layouts for all episodes (same distributions as SimulationEngine)."""
+        rng = np.random.default_rng(seed)
+        n, k = self.n_episodes, self.n_obstacles
+
+        self.robot_pos = np.tile([1.0, 0.05], (n, 1))  # Center x, bottom y + 0.05
+        self.target_pos = np.column_stack([rng.uniform(0.5, 1.5, n), rng.uniform(1.7, 1.9, n)])
+
+        widths = rng.uniform(0.3, 0.5, (n, k))
+        self.obstacles = np.empty((n, k, 3))
+        self.obstacles[..., 0] = rng.uniform(0.2, 1.8 - widths)
+        self.obstacles[..., 1] = np.linspace(0.7, 1.4, k)
+        self.obstacles[..., 2] = widths
+        self.obstacle_speeds = rng.uniform(0.0002, 0.0005, (n, k))
+        self.obstacle_directions = np.where(rng.random((n, k)) > 0.5, 1.0, -1.0)
+
+        self.status = np.full(n, RUNNING_CODE, dtype=np.int8)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+    def load_scenarios(self, scenarios):
+        """Replace all episodes by the given Scenarios (see scenarios.py), one per episode."""
+        scenarios = list(scenarios)
+        self.n_episodes = len(scenarios)
+        self.n_obstacles = len(scenarios[0].obstacles)
+        self.robot_pos = np.array([s.robot_pos for s in scenarios], dtype=float)
+        self.target_pos = np.array([s.target_pos for s in scenarios], dtype=float)
+        self.obstacles = np.array([s.obstacles for s in scenarios], dtype=float)
+        self.obstacle_speeds = np.array([s.obstacle_speeds for s in scenarios], dtype=float)
+        self.obstacle_directions = np.array([s.obstacle_directions for s in scenarios], dtype=float)
+
+        self.status = np.full(self.n_episodes, RUNNING_CODE, dtype=np.int8)
+        self.steps = np.zeros(self.n_episodes, dtype=np.int64)
+
+    @property
+    def running(self):
+        return self.status == RUNNING_CODE
+
+    def _update_obstacles(self, idx, dt):
+        obstacles = self.obstacles[idx]
+        directions = self.obstacle_directions[idx]
+        obstacles[..., 0] += self.obstacle_speeds[idx] * directions * dt
+
+        # Reverse direction if hitting walls
+        hit = (obstacles[..., 0] <= 0) | (obstacles[..., 0] + obstacles[..., 2] >= 2)
+        directions[hit] *= -1
+
+        self.obstacles[idx] = obstacles
+        self.obstacle_directions[idx] = directions
+        return obstacles
+
+    def _move_robots(self, robot_pos, speed, direction, dt):
+        angle_rad = np.radians(direction)
+        sign = np.where(angle_rad > 0, 1.0, -1.0)
+        robot_pos[:, 0] += speed * np.cos(angle_rad) * self.move_scale * sign * dt
+        robot_pos[:, 1] += speed * np.abs(np.sin(angle_rad) * self.move_scale) * dt
+
+    def _check_collisions(self, robot_pos, obstacles):
+        half_height = self.obstacle_height / 2
+        left = obstacles[..., 0]
+        closest_x = np.clip(robot_pos[:, 0:1], left, left + obstacles[..., 2])
+        closest_y = np.clip(robot_pos[:, 1:2], obstacles[..., 1] - half_height,
+                            obstacles[..., 1] + half_height)
+        distance_squared = (robot_pos[:, 0:1] - closest_x) ** 2 + (robot_pos[:, 1:2] - closest_y) ** 2
+        return np.any(distance_squared < self.robot_radius ** 2, axis=1)
+
+    def _times_of_impact(self, start, robot_pos, previous_x, obstacles):
+        half_height = self.obstacle_height / 2
+        rects = np.stack([previous_x, obstacles[..., 1] - half_height,
+                          previous_x + obstacles[..., 2], obstacles[..., 1] + half_height], axis=-1)
+        rect_displacement = np.zeros(obstacles.shape[:2] + (2,))
+        rect_displacement[..., 0] = obstacles[..., 0] - previous_x
+        return time_of_impact_batch(start, robot_pos - start, self.robot_radius, rects, rect_displacement)
+
+    def step(self, dt=None):
+        """Advance every running episode by one timestep; return the status array."""
+        dt = self.dt if dt is None else dt
+        idx = np.flatnonzero(self.running)
+        if len(idx) == 0:
+            return self.status
+
+        if self.continuous:
+            previous_x = self.obstacles[idx, :, 0]  # fancy indexing copies
+        obstacles = self._update_obstacles(idx, dt)
+        robot_pos = self.robot_pos[idx]
+        target_pos = self.target_pos[idx]
+
+        obstacle_info = None
+        if self.sensor is not None:
+            obstacle_info = self.sensor.nearest(self.sensor.scan(robot_pos, obstacles))
+
+        speed, direction = compute_fuzzy_control_batch(
+            robot_pos, target_pos, obstacles[..., :2],
+            self.goal_controller, self.obstacle_controller, obstacle_info, self.arbiter)
+        self._move_robots(robot_pos, speed, direction, dt)
+        self.steps[idx] += 1
+
+        if self.continuous:
+            start = self.robot_pos[idx]
+            impact = self._times_of_impact(start, robot_pos, previous_x, obstacles)
+            collided = np.isfinite(impact)
+            robot_pos[collided] = (start[collided]
+                                   + impact[collided, None] * (robot_pos[collided] - start[collided]))
+        else:
+            collided = self._check_collisions(robot_pos, obstacles)
+
+        # Keep robots within bounds (collided robots stay where they hit)
+        free = ~collided
+        robot_pos[free] = np.clip(robot_pos[free], 0.25, 1.75)
+        delta = robot_pos - target_pos
+        if self.continuous:
+            # Closest approach of each move to the target
+            move = robot_pos - start
+            length_squared = move[:, 0] * move[:, 0] + move[:, 1] * move[:, 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = np.clip((delta[:, 0] * move[:, 0] + delta[:, 1] * move[:, 1]) / length_squared, 0.0, 1.0)
+            t = np.where(length_squared > 0.0, t, 0.0)
+            delta = delta - t[:, None] * move
+        distance = np.sqrt(delta[:, 0] * delta[:, 0] + delta[:, 1] * delta[:, 1])
+        reached = free & (distance < self.goal_tolerance)
+
+        status = np.full(len(idx), RUNNING_CODE, dtype=np.int8)
+        status[collided] = COLLISION_CODE
+        status[reached] = GOAL_CODE
+        self.status[idx] = status
+        self.robot_pos[idx] = robot_pos
+        return self.status
+
+    def run(self, max_steps=10000):
+        """Step until every episode has finished or ``max_steps``; return the status array."""
+        for _ in range(max_steps):
+            if not self.running.any():
+                break
+            self.step()
+        self.status[self.running] = TIMEOUT_CODE
+        return self.status
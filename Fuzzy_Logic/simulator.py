@@ -1,15 +1,29 @@
 # simulator.py
-import pygame
-import random
-import numpy as np
-import math
+import argparse
+import importlib
 from controllers.goal_controller import GoalController
 from controllers.obstacle_controller import ObstacleController
-from utils.utils import compute_fuzzy_control
+from simulation.engine import SimulationEngine, COLLISION, GOAL
+from simulation.pipeline import ControlThread
+from simulation.profiling import StepProfiler
+from simulation.recorder import TrajectoryRecorder, TrajectoryLog
+
+# Imported by RobotSimulator, so the module loads (e.g. for its argument parser) without pygame
+pygame = None
+
+
+def _import_pygame():
+    global pygame
+    if pygame is None:
+        pygame = importlib.import_module('pygame')
+    return pygame
 
 
 class RobotSimulator:
-    def __init__(self):
+    """Interactive pygame front-end; the world itself lives in SimulationEngine."""
+
+    def __init__(self, compiled=False, seed=None, recorder=None, profiler=None):
+        _import_pygame()
         pygame.init()
         self.width = 800  # Window size (pixels)
         self.height = 800
@@ -19,117 +33,101 @@ class RobotSimulator:
         # Scale factors (convert from meters to pixels)
         self.scale = 400  # 2 meters = 800 pixels
 
-        # Initialize controllers
-        self.goal_controller = GoalController()
-        self.obstacle_controller = ObstacleController()
-
-        # Initialize positions
-        self.reset_simulation()
+        # Cached drawing layers: the game over text, and a static background
+        # (border and target) from which the previous frame is erased
+        font = pygame.font.Font(None, 36)
+        self.game_over_text = font.render("CHARGE, ПОКИНУТЬ ТЕЛО:)", True, (255, 0, 0))
+        self.background = pygame.Surface((self.width, self.height)).convert()
+        self.background_target = None
+        self.dirty_rects = None  # drawn last frame; None forces a full redraw
+
+        # Initialize controllers (compiled=True uses precomputed lookup tables)
+        self.goal_controller = GoalController(compiled=compiled)
+        self.obstacle_controller = ObstacleController(compiled=compiled)
+
+        # The view is an observer of the headless engine
+        # (profiler: optional StepProfiler timing each stage of the loop)
+        self.profiler = profiler
+        self.engine = SimulationEngine(self.goal_controller, self.obstacle_controller, seed=seed,
+                                       observers=[self._draw], profiler=profiler)
+
+        # Optional TrajectoryRecorder logging every step
+        self.recorder = recorder
+        if recorder is not None:
+            self.engine.observers.append(recorder)
+
+    @property
+    def robot_pos(self):
+        return self.engine.robot_pos
+
+    @property
+    def target_pos(self):
+        return self.engine.target_pos
+
+    @property
+    def obstacles(self):
+        return self.engine.obstacles
 
     def reset_simulation(self):
         """Reset the simulation with new random positions"""
-        self.robot_pos = [1.0, 0.05]  # Center x, bottom y + 0.05
-        self.target_pos = [random.uniform(0.5, 1.5), random.uniform(1.7, 1.9)]
-
-        # Initialize obstacles
-        self.obstacles = self._generate_obstacles()
-        self.obstacle_speeds = [random.uniform(0.0002, 0.0005) for _ in range(4)]
-        self.obstacle_directions = [1 if random.random() > 0.5 else -1 for _ in range(4)]
-
-    def _generate_obstacles(self):
-        obstacles = []
-        y_positions = np.linspace(0.7, 1.4, 4)
-
-        for y in y_positions:
-            width = random.uniform(0.3, 0.5)
-            x = random.uniform(0.2, 1.8 - width)
-            obstacles.append([x, y, width])
-
-        return obstacles
-
-    def _update_obstacles(self):
-        for i in range(len(self.obstacles)):
-            # Update x position
-            self.obstacles[i][0] += self.obstacle_speeds[i] * self.obstacle_directions[i]
-
-            # Reverse direction if hitting walls
-            if self.obstacles[i][0] <= 0 or self.obstacles[i][0] + self.obstacles[i][2] >= 2:
-                self.obstacle_directions[i] *= -1
-
-    def check_circle_rect_collision(self, circle_center, circle_radius, rect):
-        """Check if a circle and a rectangle collide."""
-        # Closest point on the rectangle to the circle's center
-        closest_x = max(rect.left, min(circle_center[0], rect.right))
-        closest_y = max(rect.top, min(circle_center[1], rect.bottom))
-
-        # Calculate the distance from the circle's center to this closest point
-        distance_x = circle_center[0] - closest_x
-        distance_y = circle_center[1] - closest_y
-
-        # Use the Pythagorean theorem to check if the distance is less than the circle's radius
-        distance_squared = (distance_x ** 2) + (distance_y ** 2)
-        return distance_squared < (circle_radius ** 2)
-
-
-    def _check_collision(self):
-        """Check if robot has collided with any obstacle"""
-        robot_radius = 0.25 * self.scale  # Adjust robot's radius with scale
-        robot_center = (self.robot_pos[0] * self.scale, (2 - self.robot_pos[1]) * self.scale)
-
-        for obs in self.obstacles:
-            obs_x, obs_y, obs_width = obs
-
-            # Create a rectangle for the obstacle with the scaled coordinates
-            obs_rect = pygame.Rect(
-                obs_x * self.scale,
-                (2 - obs_y) * self.scale - (0.05 * self.scale),
-                obs_width * self.scale,
-                0.1 * self.scale
-            )
-
-            # Check for collision between the circle (robot) and the rectangle (obstacle)
-            if self.check_circle_rect_collision(robot_center, robot_radius, obs_rect):
-                return True
-        return False
-
-
-    def _check_goal_reached(self):
-        """Check if robot has reached the target"""
-        dx = self.robot_pos[0] - self.target_pos[0]
-        dy = self.robot_pos[1] - self.target_pos[1]
-        distance = math.sqrt(dx * dx + dy * dy)
-        return distance < 0.15  # Goal reached if within 15cm
-
-    def _draw(self):
-        # Fill background
-        self.screen.fill((255, 255, 255))
+        self.engine.reset_simulation()
 
-        # Draw border
-        pygame.draw.rect(self.screen, (0, 0, 0), (0, 0, self.width, self.height), 2)
+    def _draw(self, engine=None, status=None):
+        self._render(self.robot_pos, self.target_pos, self.obstacles)
+
+    def _render(self, robot_pos, target_pos, obstacles):
+        """Draw a frame, sending only the regions that changed to the display."""
+        target = (int(target_pos[0] * self.scale), int((2 - target_pos[1]) * self.scale))
+        if target != self.background_target:
+            self._draw_background(target)
+
+        # Erase last frame's robot and obstacles by restoring the background under them
+        if self.dirty_rects is None:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.dirty_rects:
+                self.screen.blit(self.background, rect, rect)
 
         # Draw robot
-        robot_x = int(self.robot_pos[0] * self.scale)
-        robot_y = int((2 - self.robot_pos[1]) * self.scale)  # Flip y-coordinate
-        pygame.draw.circle(self.screen, (0, 255, 0), (robot_x, robot_y), int(0.25 * self.scale))
+        robot_x = int(robot_pos[0] * self.scale)
+        robot_y = int((2 - robot_pos[1]) * self.scale)  # Flip y-coordinate
+        drawn = [pygame.draw.circle(self.screen, (0, 255, 0), (robot_x, robot_y), int(0.25 * self.scale))]
 
-        # Draw target
-        target_x = int(self.target_pos[0] * self.scale)
-        target_y = int((2 - self.target_pos[1]) * self.scale)
-        pygame.draw.circle(self.screen, (255, 0, 0), (target_x, target_y), int(0.05 * self.scale))
+        # Draw target (again, in case the robot covers it)
+        drawn.append(pygame.draw.circle(self.screen, (255, 0, 0), target, int(0.05 * self.scale)))
 
         # Draw obstacles
-        for obs in self.obstacles:
+        for obs in obstacles:
             obs_x = int(obs[0] * self.scale)
             obs_y = int((2 - obs[1]) * self.scale)
             obs_width = int(obs[2] * self.scale)
             obs_height = int(0.1 * self.scale)
-            pygame.draw.rect(self.screen, (0, 0, 255),
-                             (obs_x, obs_y - obs_height // 2, obs_width, obs_height))
+            drawn.append(pygame.draw.rect(self.screen, (0, 0, 255),
+                                          (obs_x, obs_y - obs_height // 2, obs_width, obs_height)))
 
-        pygame.display.flip()
+        if self.dirty_rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(self.dirty_rects + drawn)
+        self.dirty_rects = drawn
+
+    def _draw_background(self, target):
+        # Fill background
+        self.background.fill((255, 255, 255))
+
+        # Draw border
+        pygame.draw.rect(self.background, (0, 0, 0), (0, 0, self.width, self.height), 2)
+
+        # Draw target
+        pygame.draw.circle(self.background, (255, 0, 0), target, int(0.05 * self.scale))
+
+        self.background_target = target
+        self.dirty_rects = None
 
     def game_over(self):
         """Display game over message and wait for the user to press 'R' to restart."""
+        clock = pygame.time.Clock()
+        self._draw_game_over()
         game_over = True
         while game_over:
             for event in pygame.event.get():
@@ -139,68 +137,151 @@ class RobotSimulator:
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:  # Нажмите 'R' для перезапуска
                         game_over = False  # Выход из состояния game over
+            clock.tick(80)
 
-            # Рисуем сообщение "Game Over"
-            self.screen.fill((255, 255, 255))
-            font = pygame.font.Font(None, 36)
-            text = font.render("CHARGE, ПОКИНУТЬ ТЕЛО:)", True, (255, 0, 0))
-            self.screen.blit(text, (self.width // 2 - text.get_width() // 2, self.height // 2 - text.get_height() // 2))
-            pygame.display.flip()
+    def _draw_game_over(self):
+        # Рисуем сообщение "Game Over"
+        self.screen.fill((255, 255, 255))
+        text = self.game_over_text
+        self.screen.blit(text, (self.width // 2 - text.get_width() // 2, self.height // 2 - text.get_height() // 2))
+        pygame.display.flip()
+        self.dirty_rects = None
 
     def run(self):
         running = True
         clock = pygame.time.Clock()
+        profiler = self.profiler
 
         while running:
+            if profiler is not None:
+                lap = profiler.clock()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_r:  # Reset simulation with 'R' key
                         self.reset_simulation()
+            if profiler is not None:
+                profiler.lap('events', lap)
 
-            # Update obstacle positions
-            self._update_obstacles()
-
-            # Get control commands
-            speed, direction = compute_fuzzy_control(
-                self.robot_pos,
-                self.target_pos,
-                [(obs[0], obs[1]) for obs in self.obstacles],
-                self.goal_controller,
-                self.obstacle_controller
-            )
-
-            # preUpdate robot position based on control commands
-            angle_rad = math.radians(direction)
-            if (angle_rad > 0):
-                self.robot_pos[0] += speed * math.cos(angle_rad) * 0.005
-            else:
-                self.robot_pos[0] += speed * math.cos(angle_rad) * -0.005
-            self.robot_pos[1] += speed * abs(math.sin(angle_rad) * 0.005)
-            print(self.robot_pos[1])
-
-            if self._check_collision():
+            status = self.engine.step()
+
+            if status == COLLISION:
                 print("Collision detected! Press 'R' to reset")
                 self.game_over()
                 self.reset_simulation()
-
-            # Keep robot within bounds
-            self.robot_pos[0] = max(0.25, min(1.75, self.robot_pos[0]))
-            self.robot_pos[1] = max(0.25, min(1.75, self.robot_pos[1]))
-
-            if self._check_goal_reached():
+            elif status == GOAL:
                 print("Goal reached! Press 'R' to reset")
                 self.reset_simulation()
 
-            self._draw()
+            if profiler is not None:
+                lap = profiler.clock()
+            clock.tick(80)
+            if profiler is not None:
+                profiler.lap('frame_wait', lap)
+
+        if self.recorder is not None:
+            self.recorder.close()
+        pygame.quit()
+
+    def run_pipelined(self, control_rate=80, fps=80):
+        """Like run, but the engine steps on a ControlThread while this thread draws.
+
+        Drawing frame N overlaps with inference and physics of frame N+1, the
+        control rate (``control_rate`` Hz, None for as fast as possible) no
+        longer waits for rendering, and game over is a state of the view
+        instead of a blocking loop, so events are handled throughout.
+        """
+        clock = pygame.time.Clock()
+        control = ControlThread(self.engine, control_rate)
+        # pygame may only draw from this thread: publish frames instead of drawing in the engine
+        self.engine.observers.remove(self._draw)
+        control.start()
+
+        shown = None
+        game_over = False
+        try:
+            while True:
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        return
+                    elif event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_r:  # Reset simulation with 'R' key
+                            game_over = False
+                            control.reset()
+
+                frame = control.frame
+                if frame is not shown:
+                    shown = frame
+                    if frame.status == COLLISION:
+                        print("Collision detected! Press 'R' to reset")
+                        game_over = True
+                    elif frame.status == GOAL:
+                        print("Goal reached! Press 'R' to reset")
+                        control.reset()
+                    if game_over:
+                        self._draw_game_over()
+                    else:
+                        self._render(frame.robot_pos, frame.target_pos, frame.obstacles)
+
+                clock.tick(fps)
+        finally:
+            control.stop()
+            self.engine.observers.insert(0, self._draw)
+            if self.recorder is not None:
+                self.recorder.close()
+            pygame.quit()
+
+    def replay(self, log, start=0, stop=None, stride=1):
+        """Play back the records of a TrajectoryLog through this view."""
+        clock = pygame.time.Clock()
+        stop = len(log) if stop is None else min(stop, len(log))
+
+        for index in range(start, stop, stride):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    return
+
+            # Only the record being shown is read from the memory-mapped file
+            record = log[index]
+            self._render(record['robot'].tolist(), record['target'].tolist(), record['obstacles'].tolist())
             clock.tick(80)
 
         pygame.quit()
 
 def main():
-    simulator = RobotSimulator()
-    simulator.run()
+    parser = argparse.ArgumentParser(description="Robot navigation simulator")
+    parser.add_argument('--compiled', action='store_true', help="use lookup-table controllers")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--record', metavar='PATH', help="log every step to a trajectory file")
+    parser.add_argument('--replay', metavar='PATH', help="play back a trajectory file instead of simulating")
+    parser.add_argument('--start', type=int, default=0, help="first record to replay")
+    parser.add_argument('--stride', type=int, default=1, help="replay every n-th record")
+    parser.add_argument('--pipelined', action='store_true',
+                        help="step the engine on its own thread, overlapping with drawing")
+    parser.add_argument('--control-rate', type=float, default=80,
+                        help="control steps per second in --pipelined mode (0: as fast as possible)")
+    parser.add_argument('--profile', metavar='PATH', help="write per-stage step timings as JSON on exit")
+    parser.add_argument('--trace', metavar='PATH', help="write stage timings as a Chrome trace on exit")
+    args = parser.parse_args()
+
+    recorder = TrajectoryRecorder(args.record) if args.record else None
+    profiler = StepProfiler(trace=bool(args.trace)) if args.profile or args.trace else None
+    simulator = RobotSimulator(compiled=args.compiled, seed=args.seed, recorder=recorder, profiler=profiler)
+    if args.replay:
+        simulator.replay(TrajectoryLog(args.replay), start=args.start, stride=args.stride)
+    elif args.pipelined:
+        simulator.run_pipelined(control_rate=args.control_rate or None)
+    else:
+        simulator.run()
+
+    if profiler is not None:
+        print(profiler)
+        if args.profile:
+            profiler.save_json(args.profile)
+        if args.trace:
+            profiler.save_chrome_trace(args.trace)
 
 if __name__ == "__main__":
     main()
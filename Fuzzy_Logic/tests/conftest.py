@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# Modules import each other from the Fuzzy_Logic directory (controllers, utils, simulation)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,75 @@
+# test_batch_inference.py
+"""compute_batch against one compute call per sample."""
+import numpy as np
+import pytest
+from controllers import mamdani
+from controllers.arbitration import BlendedArbiter
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import OBSTACLE_RULES, ObstacleController
+from utils.utils import compute_fuzzy_control, compute_fuzzy_control_batch
+
+# Inputs run past both ends of the universes, where inputs are clipped and rules may not fire
+ANGLES = np.random.default_rng(0).uniform(-120, 120, 200)
+DISTANCES = np.random.default_rng(1).uniform(-0.05, 0.5, 200)
+
+MODES = {
+    'fuzzy': {},
+    'analytic': {'analytic': True},
+    'compiled': {'compiled': True},
+}
+
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_goal_batch_matches_scalar(mode):
+    controller = GoalController(**MODES[mode])
+    speed, direction = controller.compute_batch(ANGLES)
+    expected = np.array([controller.compute(angle) for angle in ANGLES.tolist()])
+    np.testing.assert_allclose(speed, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(direction, expected[:, 1], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+@pytest.mark.parametrize('rule_table', [None, OBSTACLE_RULES], ids=['default', 'rule_table'])
+def test_obstacle_batch_matches_scalar(mode, rule_table):
+    options = dict(MODES[mode], rule_table=rule_table)
+    if mode == 'compiled' and rule_table is not None:
+        options['max_error'] = None  # the fallback makes the drafted rules' table coarse
+    controller = ObstacleController(**options)
+    speed, direction = controller.compute_batch(ANGLES, DISTANCES)
+    expected = np.array([controller.compute(angle, distance)
+                         for angle, distance in zip(ANGLES.tolist(), DISTANCES.tolist())])
+    np.testing.assert_allclose(speed, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(direction, expected[:, 1], rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize('blend', [False, True], ids=['switch', 'blend'])
+def test_control_batch_matches_scalar(blend):
+    goal, obstacle = GoalController(), ObstacleController(rule_table=OBSTACLE_RULES)
+    arbiter = BlendedArbiter(goal, obstacle) if blend else None
+    rng = np.random.default_rng(2)
+    robots = rng.uniform(0.25, 1.75, (100, 2))
+    targets = rng.uniform(0.25, 1.75, (100, 2))
+    obstacles = rng.uniform(0.0, 2.0, (100, 4, 2))
+    speed, direction = compute_fuzzy_control_batch(robots, targets, obstacles, goal, obstacle, arbiter=arbiter)
+    expected = np.array([compute_fuzzy_control(robot.tolist(), target.tolist(), [tuple(p) for p in points.tolist()],
+                                               goal, obstacle, arbiter=arbiter)
+                         for robot, target, points in zip(robots, targets, obstacles)])
+    np.testing.assert_allclose(speed, expected[:, 0], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(direction, expected[:, 1], rtol=0, atol=1e-9)
+
+
+def test_analytic_centroid_batch_matches_scalar():
+    rng = np.random.default_rng(3)
+    universe = np.linspace(-1.0, 1.0, 21)
+    # Breakpoints on a coarse grid, so terms share points, have vertical edges and open shoulders
+    grid = np.linspace(-1.5, 1.5, 13)
+    for _ in range(100):
+        shapes = []
+        for _ in range(rng.integers(1, 7)):
+            params = np.sort(rng.choice(grid, rng.choice([3, 4])))
+            shapes.append(mamdani.membership(universe, params).breakpoints)
+        centroid = mamdani.AnalyticCentroid(universe[0], universe[-1], shapes)
+        cuts = rng.uniform(-0.2, 1.0, (40, len(shapes)))
+        cuts[rng.random(cuts.shape) < 0.2] = 1.0
+        expected = [np.nan if value is None else value for value in map(centroid, cuts.tolist())]
+        np.testing.assert_allclose(centroid.batch(cuts), expected, rtol=0, atol=1e-12)
@@ -0,0 +1,54 @@
+# test_batch_world.py
+"""BatchWorld against SimulationEngine, step by step on the same scenarios."""
+import numpy as np
+import pytest
+from controllers.arbitration import BlendedArbiter
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import OBSTACLE_RULES, ObstacleController
+from simulation.engine import SimulationEngine, COLLISION, GOAL, RUNNING
+from simulation.scenarios import ScenarioStream
+from simulation.sensors import RangeSensorRing
+from simulation.world import BatchWorld, STATUSES
+
+MODES = {
+    'plain': {},
+    'continuous': {'continuous': True, 'dt': 8.0},
+    'sensor': {'sensor': True},
+    'arbiter': {'arbiter': True},
+}
+
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_batch_world_matches_engine(mode):
+    options = dict(MODES[mode])
+    dt = options.pop('dt', 4.0)
+    goal, obstacle = GoalController(), ObstacleController(rule_table=OBSTACLE_RULES)
+    if options.pop('sensor', False):
+        options['sensor'] = RangeSensorRing()
+    if options.pop('arbiter', False):
+        options['arbiter'] = BlendedArbiter(goal, obstacle)
+
+    # The controllers collide on every drawn layout; the same layouts with the bars lifted out
+    # of the field reach the goal
+    scenarios = list(ScenarioStream(seed=3, stop=4))
+    scenarios += [s._replace(obstacles=tuple((x, y + 3.0, width) for x, y, width in s.obstacles))
+                  for s in scenarios]
+    world = BatchWorld(len(scenarios), goal, obstacle, dt=dt, **options)
+    world.load_scenarios(scenarios)
+    engines = [SimulationEngine(goal, obstacle, dt=dt, **options) for _ in scenarios]
+    for engine, scenario in zip(engines, scenarios):
+        engine.load_scenario(scenario)
+
+    status = [RUNNING] * len(engines)
+    for _ in range(1000):
+        world.step()
+        for i, engine in enumerate(engines):
+            if status[i] == RUNNING:
+                status[i] = engine.step()
+            assert STATUSES[world.status[i]] == status[i], (i, engine.steps)
+            assert world.steps[i] == engine.steps
+            np.testing.assert_allclose(world.robot_pos[i], engine.robot_pos, rtol=0, atol=1e-9)
+            np.testing.assert_allclose(world.obstacles[i], engine.obstacles, rtol=0, atol=1e-9)
+        if not world.running.any():
+            break
+    assert set(status) == {COLLISION, GOAL}
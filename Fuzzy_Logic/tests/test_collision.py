@@ -0,0 +1,71 @@
+# test_collision.py
+"""Swept collision tests against sampling the step, and scalar against batched."""
+import numpy as np
+import pytest
+from simulation.collision import time_of_impact, time_of_impact_batch
+
+RADIUS = 0.25
+
+
+def _random_cases(seed, n):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        left, bottom = rng.uniform(0.0, 1.5, 2)
+        rect = (left, bottom, left + rng.uniform(0.0, 0.5), bottom + rng.choice([0.0, 0.1]))
+        start = np.array([left, bottom]) + rng.uniform(-0.8, 0.8, 2)
+        # Some moves are axis-aligned or zero, where the slab tests divide by zero
+        displacement = rng.uniform(-1.5, 1.5, 2) * rng.choice([0.0, 1.0], 2)
+        rect_displacement = (rng.uniform(-0.3, 0.3) * rng.choice([0.0, 1.0]), 0.0)
+        yield tuple(start), tuple(displacement), rect, rect_displacement
+
+
+def _distance(t, start, displacement, rect, rect_displacement):
+    # Distance from the circle's center to the rectangle, both moved to time(s) t
+    t = np.asarray(t, dtype=float)
+    x = start[0] + t * displacement[0]
+    y = start[1] + t * displacement[1]
+    left, right = rect[0] + t * rect_displacement[0], rect[2] + t * rect_displacement[0]
+    bottom, top = rect[1] + t * rect_displacement[1], rect[3] + t * rect_displacement[1]
+    return np.hypot(x - np.clip(x, left, right), y - np.clip(y, bottom, top))
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_time_of_impact_matches_sampled_step(seed):
+    t = np.linspace(0.0, 1.0, 4001)
+    hits = 0
+    for case in _random_cases(seed, 250):
+        start, displacement, rect, rect_displacement = case
+        distance = _distance(t, *case)
+        impact = time_of_impact(start, displacement, RADIUS, rect, rect_displacement)
+        if impact is None:
+            assert distance.min() >= RADIUS - 1e-9, case
+            continue
+        hits += 1
+        assert 0.0 <= impact <= 1.0
+        # Touching at the time of impact, and apart at every sample before it
+        assert _distance(impact, *case) <= RADIUS + 1e-9, case
+        assert distance[t < impact - 1e-9].min(initial=np.inf) >= RADIUS - 1e-9, case
+    assert hits > 40
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_batch_matches_scalar(seed):
+    cases = list(_random_cases(seed, 240))
+    n, k = 60, 4
+    start = np.array([cases[i * k][0] for i in range(n)])
+    displacement = np.array([cases[i * k][1] for i in range(n)])
+    rects = np.array([case[2] for case in cases]).reshape(n, k, 4)
+    rect_displacement = np.array([case[3] for case in cases]).reshape(n, k, 2)
+
+    batch = time_of_impact_batch(start, displacement, RADIUS, rects, rect_displacement)
+    for i in range(n):
+        impacts = [time_of_impact(start[i], displacement[i], RADIUS, rects[i, j], rect_displacement[i, j])
+                   for j in range(k)]
+        expected = min((t for t in impacts if t is not None), default=np.inf)
+        assert batch[i] == pytest.approx(expected, abs=1e-12), i
+
+
+def test_batch_without_rectangles():
+    impact = time_of_impact_batch(np.zeros((3, 2)), np.ones((3, 2)), RADIUS, np.zeros((3, 0, 4)),
+                                  np.zeros((3, 0, 2)))
+    assert np.all(np.isinf(impact))
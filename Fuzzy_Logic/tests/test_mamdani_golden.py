@@ -0,0 +1,57 @@
+# test_mamdani_golden.py
+"""Native Mamdani engine against outputs recorded from skfuzzy 0.5.0.
+
+``golden_mamdani.json`` holds, per controller, input samples and skfuzzy's
+crisp outputs (``null`` where no rule fires). The obstacle cases use the
+drafted avoidance rules (``OBSTACLE_RULES``), since the default
+ObstacleController has no rules; their distances are in metres, as sensed.
+"""
+import json
+import os
+import pytest
+from controllers import mamdani
+from controllers.goal_controller import GoalController
+from controllers.obstacle_controller import OBSTACLE_RULES, ObstacleController
+
+with open(os.path.join(os.path.dirname(__file__), 'golden_mamdani.json')) as f:
+    GOLDEN = json.load(f)
+
+CONTROLLERS = {
+    'goal': lambda: GoalController(),
+    'obstacle_rule_table': lambda: ObstacleController(rule_table=OBSTACLE_RULES),
+}
+
+
+@pytest.mark.parametrize('name', sorted(CONTROLLERS))
+def test_matches_golden_outputs(name):
+    simulation = CONTROLLERS[name]().simulation
+    for case in GOLDEN[name]:
+        actual = simulation.compute(**case['inputs'])
+        if case['outputs'] is None:
+            assert actual is None, case['inputs']
+            continue
+        assert actual is not None, case['inputs']
+        for label, expected in case['outputs'].items():
+            assert actual[label] == pytest.approx(expected, abs=1e-9), (case['inputs'], label)
+
+
+@pytest.mark.parametrize('name', sorted(CONTROLLERS))
+def test_agrees_with_skfuzzy(name):
+    pytest.importorskip('skfuzzy')
+    controller = CONTROLLERS[name]()
+    errors = mamdani.compare_with_skfuzzy(controller.controller, [case['inputs'] for case in GOLDEN[name]])
+    assert max(errors.values()) < 1e-9
+
+
+def test_controller_compute_matches_golden_outputs():
+    # The public entry points take the sensed values as they are (distance in metres)
+    controller = ObstacleController(rule_table=OBSTACLE_RULES)
+    for case in GOLDEN['obstacle_rule_table']:
+        angle, distance = case['inputs']['angle_to_obstacle'], case['inputs']['distance_to_obstacle']
+        if case['outputs'] is None:
+            expected = (5, -angle)
+        else:
+            expected = (case['outputs']['robot_speed'], case['outputs']['robot_direction'])
+        assert controller.compute(angle, distance) == pytest.approx(expected, abs=1e-9), case['inputs']
+        batch = controller.compute_batch([angle], [distance])
+        assert (batch[0][0], batch[1][0]) == pytest.approx(expected, abs=1e-9), case['inputs']
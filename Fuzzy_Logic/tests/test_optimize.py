@@ -0,0 +1,45 @@
+# test_optimize.py
+"""Genomes of the rule base search and their evaluation."""
+import copy
+import numpy as np
+from simulation.optimize import (REJECTED_FITNESS, SearchSpace, build_controllers, default_genome, evaluate,
+                                 search)
+
+
+def test_distance_genes_change_fitness():
+    genome = default_genome()
+    moved = copy.deepcopy(genome)
+    moved['obstacle']['distance_to_obstacle']['close'] = [0.0, 0.02, 0.04]
+    assert evaluate(moved, episodes=8, max_steps=500) != evaluate(genome, episodes=8, max_steps=500)
+
+
+def test_mutated_genes_stay_in_their_universe():
+    genome = default_genome()
+    space = SearchSpace(genome)
+    rng = np.random.default_rng(0)
+    child = space.crossover(genome, space.mutate(genome, rng, sigma=0.5, rule_rate=0.5), rng)
+    for key, controller in zip(('goal', 'obstacle'), build_controllers(child)):
+        for variable, terms in child[key].items():
+            universe = getattr(controller, variable).universe
+            for params in terms.values():
+                assert universe[0] <= min(params) and max(params) <= universe[-1]
+                assert params == sorted(params)
+
+
+def test_degenerate_output_term_is_rejected():
+    genome = default_genome()
+    # 'fast' between two samples of the speed universe: all zero, so no rule could drive fast
+    genome['goal']['robot_speed']['fast'] = [0.151, 0.152, 0.153, 0.154]
+    score = evaluate(genome, episodes=4, max_steps=100)
+    assert score['fitness'] == REJECTED_FITNESS
+    assert 'robot_speed[fast]' in score['rejected']
+
+
+def test_search_without_generations_returns_a_state(tmp_path):
+    checkpoint = str(tmp_path / 'best_rules.json')
+    options = dict(population=2, episodes=2, workers=1, max_steps=20, checkpoint=checkpoint)
+    assert search(generations=0, **options)['best_score'] is None
+
+    finished = search(generations=1, **options)
+    # Resuming a finished run has nothing left to do
+    assert search(generations=1, resume=True, **options) == finished
@@ -1,3 +1,4 @@
 # utils/__init__.py
 from .utils import calculate_angle_to_target
-from .utils import compute_fuzzy_control
\ No newline at end of file
+from .utils import compute_fuzzy_control
+from .utils import compute_fuzzy_control_batch
@@ -1,5 +1,6 @@
 # utils.py
 import math
+import numpy as np
 from controllers.goal_controller import GoalController
 from controllers.obstacle_controller import ObstacleController
 
@@ -44,12 +45,106 @@ def get_obstacle_info(robot_pos, obstacles):
     return min_angle, min_distance
 
 
-def compute_fuzzy_control(robot_pos, target_pos, obstacles, goal_controller, obstacle_controller):
+def compute_fuzzy_control(robot_pos, target_pos, obstacles, goal_controller, obstacle_controller,
+                          obstacle_info=None, arbiter=None):
+    # obstacle_info = (angle, distance) from another sensor (e.g. the IR ring) replaces get_obstacle_info
+    # arbiter (e.g. BlendedArbiter) replaces the hard switch between the two controllers
     angle_to_goal = calculate_angle_to_target(robot_pos, target_pos)
 
-    if obstacles:
-        obstacle_angle, obstacle_distance = get_obstacle_info(robot_pos, obstacles)
+    if arbiter is not None:
+        if obstacle_info is None:
+            obstacle_info = get_obstacle_info(robot_pos, obstacles)
+        return arbiter.compute(angle_to_goal, *obstacle_info)
+
+    if obstacle_info is not None or obstacles:
+        if obstacle_info is None:
+            obstacle_info = get_obstacle_info(robot_pos, obstacles)
+        obstacle_angle, obstacle_distance = obstacle_info
         if obstacle_distance <= 0.4:  # 40 cm = 0.4 units
             return obstacle_controller.compute(obstacle_angle, obstacle_distance)
 
     return goal_controller.compute(angle_to_goal)
+
+
+def calculate_angle_to_target_batch(robot_pos, target_pos):
+    """Vectorized calculate_angle_to_target for arrays of shape (N, 2)."""
+    robot_pos = np.asarray(robot_pos, dtype=float)
+    target_pos = np.asarray(target_pos, dtype=float)
+    angle_deg = np.degrees(np.arctan2(target_pos[..., 1] - robot_pos[..., 1],
+                                      target_pos[..., 0] - robot_pos[..., 0]))
+    return _normalize_angle_batch(angle_deg)
+
+
+def get_obstacle_info_batch(robot_pos, obstacles):
+    """Vectorized get_obstacle_info.
+
+    ``robot_pos`` has shape (N, 2) and ``obstacles`` (N, K, 2), or (K, 2) when
+    all robots share the same obstacles. Returns angle and distance arrays of
+    shape (N,), with distance ``inf`` where nothing is within range.
+    """
+    robot_pos = np.asarray(robot_pos, dtype=float)
+    obstacles = np.asarray(obstacles, dtype=float)
+    detection_threshold = 0.4  # 40 cm detection threshold
+
+    if obstacles.size == 0:
+        # No obstacles: the same special values as get_obstacle_info
+        return np.zeros(len(robot_pos)), np.full(len(robot_pos), np.inf)
+
+    dx = obstacles[..., 0] - robot_pos[:, 0:1]
+    dy = obstacles[..., 1] - robot_pos[:, 1:2]
+    distance = np.sqrt(dx * dx + dy * dy)
+    distance[distance > detection_threshold] = np.inf
+
+    # argmin keeps the first of equally close obstacles, like the scalar loop
+    nearest = np.argmin(distance, axis=1)
+    rows = np.arange(len(robot_pos))
+    min_distance = distance[rows, nearest]
+    min_angle = _normalize_angle_batch(np.degrees(np.arctan2(dy[rows, nearest], dx[rows, nearest])))
+    min_angle[np.isinf(min_distance)] = 0
+    return min_angle, min_distance
+
+
+def compute_fuzzy_control_batch(robot_pos, target_pos, obstacles, goal_controller, obstacle_controller,
+                                obstacle_info=None, arbiter=None):
+    """Vectorized compute_fuzzy_control for N robots at once.
+
+    Returns speed and direction arrays of shape (N,). Robots with an obstacle
+    within 0.4 are handled by the obstacle controller, the rest by the goal
+    controller, each in a single batched inference call. ``obstacle_info``
+    optionally supplies (angle, distance) arrays from another sensor, and
+    ``arbiter`` replaces the switch as in compute_fuzzy_control.
+    """
+    robot_pos = np.asarray(robot_pos, dtype=float)
+
+    if arbiter is not None:
+        if obstacle_info is None:
+            obstacle_info = get_obstacle_info_batch(robot_pos, obstacles)
+        target_pos = np.broadcast_to(np.asarray(target_pos, dtype=float), robot_pos.shape)
+        return arbiter.compute_batch(calculate_angle_to_target_batch(robot_pos, target_pos), *obstacle_info)
+
+    speed = np.empty(len(robot_pos))
+    direction = np.empty(len(robot_pos))
+
+    near = np.zeros(len(robot_pos), dtype=bool)
+    if obstacle_info is None and np.size(obstacles):
+        obstacle_info = get_obstacle_info_batch(robot_pos, obstacles)
+    if obstacle_info is not None:
+        obstacle_angle, obstacle_distance = obstacle_info
+        near = obstacle_distance <= 0.4  # 40 cm = 0.4 units
+        if near.any():
+            speed[near], direction[near] = obstacle_controller.compute_batch(
+                obstacle_angle[near], obstacle_distance[near])
+
+    far = ~near
+    if far.any():
+        target_pos = np.broadcast_to(np.asarray(target_pos, dtype=float), robot_pos.shape)
+        angle_to_goal = calculate_angle_to_target_batch(robot_pos[far], target_pos[far])
+        speed[far], direction[far] = goal_controller.compute_batch(angle_to_goal)
+
+    return speed, direction
+
+
+def _normalize_angle_batch(angle_deg):
+    # Same folding into [-95, 95] as the scalar helpers
+    angle_deg = np.where(angle_deg > 95, angle_deg - 180, angle_deg)
+    return np.where(angle_deg < -95, angle_deg + 180, angle_deg)